@@ -0,0 +1,48 @@
+"""Запуск проектов ya_news и ya_note вне manage.py для бенчмарков.
+
+Каждый бенчмарк работает с одним проектом и отдельной базой данных,
+чтобы не трогать рабочий db.sqlite3.
+"""
+import importlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import django
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PROJECTS = {
+    'news': ('ya_news', 'yanews.settings'),
+    'notes': ('ya_note', 'yanote.settings'),
+}
+
+
+def setup(project, database=None, **overrides):
+    """Настраивает Django для проекта и возвращает путь к базе данных.
+
+    Если путь к базе не передан, создаётся временный файл. Остальные
+    именованные аргументы переопределяют настройки проекта.
+    """
+    directory, settings_module = PROJECTS[project]
+    sys.path.insert(0, str(BASE_DIR / directory))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    settings = importlib.import_module(os.environ['DJANGO_SETTINGS_MODULE'])
+    if database is None:
+        handle, database = tempfile.mkstemp(
+            prefix=f'bench-{project}-', suffix='.sqlite3'
+        )
+        os.close(handle)
+    settings.DATABASES['default']['NAME'] = str(database)
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+    return database
+
+
+def migrate(*args):
+    """Применяет миграции без вывода в консоль."""
+    from django.core.management import call_command
+
+    call_command('migrate', *args, verbosity=0)
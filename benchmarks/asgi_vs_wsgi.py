@@ -0,0 +1,105 @@
+"""Пропускная способность синхронных и асинхронных страниц новостей.
+
+Одни и те же страницы запрашиваются в одном процессе двумя способами:
+синхронные представления через WSGI-обработчик из пула потоков
+(как многопоточный WSGI-сервер) и асинхронные представления через
+ASGI-обработчик из цикла событий с тем же числом одновременных запросов.
+
+    python -m benchmarks.asgi_vs_wsgi --requests 1000 --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import _django
+
+
+def seed(comments):
+    from django.contrib.auth import get_user_model
+    from news.models import Comment, News
+
+    author = get_user_model().objects.create(username='bench')
+    News.objects.bulk_create(
+        News(title=f'News {i}', text='Text') for i in range(20)
+    )
+    news = News.objects.first()
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Comment {i}')
+        for i in range(comments)
+    )
+    return news.pk
+
+
+def run_wsgi(url, requests, concurrency):
+    from django.test import Client
+
+    def worker(count):
+        client = Client()
+        for _ in range(count):
+            assert client.get(url).status_code == 200
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        shares = [requests // concurrency] * concurrency
+        list(pool.map(worker, shares))
+    return sum(shares) / (time.perf_counter() - started)
+
+
+def run_asgi(url, requests, concurrency):
+    from django.test import AsyncClient
+
+    async def worker(count):
+        client = AsyncClient()
+        for _ in range(count):
+            response = await client.get(url)
+            assert response.status_code == 200
+
+    async def main():
+        shares = [requests // concurrency] * concurrency
+        await asyncio.gather(*(worker(count) for count in shares))
+        return sum(shares)
+
+    started = time.perf_counter()
+    total = asyncio.run(main())
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--comments', type=int, default=200)
+    args = parser.parse_args()
+
+    # Кеш главной страницы отключён, чтобы сравнивать одинаковую работу.
+    database = _django.setup(
+        'news', ALLOWED_HOSTS=['*'], NEWS_HOME_CACHE_TIMEOUT=0
+    )
+    try:
+        _django.migrate()
+        news_pk = seed(args.comments)
+        from django.urls import reverse
+
+        pages = {
+            'home': ('news:home', 'news:home_async', {}),
+            'detail': ('news:detail', 'news:detail_async', {'pk': news_pk}),
+        }
+        print(f'{args.requests} запросов, {args.concurrency} одновременно')
+        for name, (sync_name, async_name, kwargs) in pages.items():
+            wsgi = run_wsgi(
+                reverse(sync_name, kwargs=kwargs),
+                args.requests, args.concurrency
+            )
+            asgi = run_asgi(
+                reverse(async_name, kwargs=kwargs),
+                args.requests, args.concurrency
+            )
+            print(f'  {name}: WSGI {wsgi:.0f} запр/с, ASGI {asgi:.0f} запр/с')
+    finally:
+        os.remove(database)
+
+
+if __name__ == '__main__':
+    main()
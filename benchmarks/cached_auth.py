@@ -0,0 +1,138 @@
+"""Сессии и пользователь из кеша против чтения из базы.
+
+Авторизованный клиент много раз запрашивает страницу новости (news)
+или список заметок (notes) с двумя конфигурациями: сессии в базе
+и ModelBackend, как было раньше, и сессии cached_db с
+CachedModelBackend. Настройки читаются при запуске Django, поэтому
+каждая конфигурация работает в отдельном процессе со своей базой.
+
+Кеш по умолчанию — LocMemCache из настроек проекта. С --cache file
+используется FileBasedCache во временном каталоге: он ближе
+к внешнему кешу (memcached, Redis), потому что каждое обращение
+сериализует данные и идёт мимо памяти процесса.
+
+    python -m benchmarks.cached_auth news --requests 2000 --cache file
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import _django
+
+VARIANTS = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': [
+            'django.contrib.auth.backends.ModelBackend'
+        ],
+    },
+    'cached': {},
+}
+
+
+def prepare_news():
+    from django.urls import reverse
+    from news.models import Comment, News
+
+    news = News.objects.create(title='Новость', text='Текст')
+    Comment.objects.create(news=news, text='Комментарий')
+    return reverse('news:detail', kwargs={'pk': news.pk})
+
+
+def prepare_notes():
+    from django.urls import reverse
+
+    return reverse('notes:list')
+
+
+PROJECTS = {
+    'news': prepare_news,
+    'notes': prepare_notes,
+}
+
+
+def browse(project, requests):
+    """Запрашивает страницу от имени вошедшего пользователя."""
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client
+
+    url = PROJECTS[project]()
+    client = Client()
+    client.force_login(get_user_model().objects.create(username='reader'))
+    client.get(url)
+    # connection.queries хранит не больше 9000 запросов, поэтому
+    # запросы считаются обёрткой.
+    executed = 0
+
+    def count(execute, *args):
+        nonlocal executed
+        executed += 1
+        return execute(*args)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get(url)
+        elapsed = time.perf_counter() - started
+    return {
+        'per_second': requests / elapsed,
+        'queries': executed / requests,
+    }
+
+
+def run_variant(args):
+    """Тело дочернего процесса: одна конфигурация на своей базе."""
+    overrides = dict(VARIANTS[args.variant])
+    with tempfile.TemporaryDirectory() as directory:
+        if args.cache == 'file':
+            overrides['CACHES'] = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': directory,
+            }}
+        database = _django.setup(
+            args.project, DEBUG=False, ALLOWED_HOSTS=['*'],
+            QUERY_BUDGET_STRICT=False, **overrides,
+        )
+        logging.disable(logging.CRITICAL)
+        try:
+            _django.migrate()
+            print(json.dumps(browse(args.project, args.requests)))
+        finally:
+            os.remove(database)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('project', choices=PROJECTS)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--cache', choices=('locmem', 'file'),
+                        default='locmem')
+    parser.add_argument('--variant', choices=VARIANTS,
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.variant:
+        run_variant(args)
+        return
+
+    print(f'{args.project}: {args.requests} запросов, кеш {args.cache}')
+    for variant in VARIANTS:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.cached_auth', args.project,
+             '--requests', str(args.requests), '--cache', args.cache,
+             '--variant', variant],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(f'  {variant}: {result["per_second"]:.0f} запр/с, '
+              f'запросов к базе {result["queries"]:.1f} на страницу')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Нагрузочный прогон основных страниц проекта.
+
+Заполняет временную базу заданным объёмом данных через bulk_create,
+затем отправляет запросы к основным URL через WSGI-обработчик Django
+в том же процессе (тестовый клиент) и для каждого сценария выводит
+перцентили задержки, число запросов к базе на запрос и пиковый расход
+памяти на запрос (отдельный проход под tracemalloc, чтобы трассировка
+не искажала задержку). Результат сохраняется в JSON вместе с коммитом
+и параметрами; с --baseline выводится сравнение с прошлым прогоном.
+
+    python -m benchmarks.load news --news 200 --comments 50 --output news.json
+    python -m benchmarks.load notes --users 50 --notes 200 \\
+        --output notes.json --baseline notes-main.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from io import StringIO
+
+from benchmarks import _django
+
+BATCH_SIZE = 5000
+
+
+class Scenario:
+    """Запрос одного вида: метод, адрес и данные формы на каждый вызов."""
+
+    def __init__(self, name, method, url, data=None, client=None):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.data = data or (lambda: None)
+        self.client = client
+
+    def __call__(self):
+        response = getattr(self.client, self.method)(self.url(), self.data())
+        assert response.status_code < 400, (self.name, response.status_code)
+
+
+def logged_in_client(user):
+    from django.test import Client
+
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def seed_news(args, randomizer):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.test import Client
+    from django.urls import reverse
+    from news import search
+    from news.models import Comment, News
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'reader{i}') for i in range(args.users)
+    )
+    users = list(User.objects.all())
+    News.objects.bulk_create(
+        (News(title=f'Новость {i}', text=f'Текст новости {i}',
+              comment_count=args.comments) for i in range(args.news)),
+        batch_size=BATCH_SIZE,
+    )
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(news_id=news_id, author=randomizer.choice(users),
+                    text=f'Комментарий {i}')
+            for news_id in news_ids
+            for i in range(args.comments)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    if search.fts5_available():
+        call_command('rebuild_news_index', stdout=StringIO())
+
+    def detail_url():
+        pk = randomizer.choice(news_ids)
+        return reverse('news:detail', kwargs={'pk': pk})
+
+    anonymous = Client()
+    writer = logged_in_client(users[0])
+    return [
+        Scenario('news:home', 'get', lambda: reverse('news:home'),
+                 client=anonymous),
+        Scenario('news:detail', 'get', detail_url, client=anonymous),
+        Scenario('news:detail POST', 'post', detail_url,
+                 lambda: {'text': 'Новый комментарий'}, writer),
+    ]
+
+
+def seed_notes(args, randomizer):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.urls import reverse
+    from notes.models import Note
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'author{i}') for i in range(args.users)
+    )
+    users = list(User.objects.all())
+    Note.objects.bulk_create(
+        (
+            Note(title=f'Заметка {i}', text=f'Текст заметки {i}',
+                 slug=f'{user.username}-{i}', author=user)
+            for user in users
+            for i in range(args.notes)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    call_command('rebuild_notes_index', stdout=StringIO())
+    client = logged_in_client(users[0])
+    counter = iter(range(10 ** 9))
+    return [
+        Scenario('notes:list', 'get', lambda: reverse('notes:list'),
+                 client=client),
+        Scenario('notes:add', 'post', lambda: reverse('notes:add'),
+                 lambda: {'title': f'Новая заметка {next(counter)}',
+                          'text': 'Текст'}, client),
+    ]
+
+
+PROJECTS = {
+    'news': seed_news,
+    'notes': seed_notes,
+}
+
+
+def percentile(values, percent):
+    return statistics.quantiles(values, n=100)[percent - 1]
+
+
+def measure(scenario, requests, warmup):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(warmup):
+        scenario()
+    timings = []
+    queries = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            scenario()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+    # Память меряется отдельным коротким проходом: tracemalloc
+    # замедляет выделение памяти и исказил бы задержку.
+    peaks = []
+    tracemalloc.start()
+    for _ in range(min(requests, 50)):
+        tracemalloc.reset_peak()
+        scenario()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return {
+        'requests': requests,
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries': statistics.median(queries),
+        'peak_kib': round(max(peaks) / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Изменение перцентилей относительно прошлого прогона, в процентах."""
+    print(f'Сравнение с {baseline["commit"]} ({baseline["created"]}):')
+    for name, current in results['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        changes = ', '.join(
+            f'{key} {(current[key] / previous[key] - 1) * 100:+.1f}%'
+            for key in ('p50_ms', 'p95_ms', 'p99_ms')
+            if previous[key]
+        )
+        print(f'  {name}: {changes}; запросов к базе '
+              f'{previous["queries"]} -> {current["queries"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('project', choices=PROJECTS)
+    parser.add_argument('--news', type=int, default=200,
+                        help='Новостей (news).')
+    parser.add_argument('--comments', type=int, default=50,
+                        help='Комментариев к каждой новости (news).')
+    parser.add_argument('--users', type=int, default=50,
+                        help='Пользователей.')
+    parser.add_argument('--notes', type=int, default=200,
+                        help='Заметок у каждого пользователя (notes).')
+    parser.add_argument('--requests', type=int, default=500,
+                        help='Запросов на сценарий.')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Файл для результатов в JSON.')
+    parser.add_argument('--baseline', help='Результаты прошлого прогона.')
+    args = parser.parse_args()
+
+    database = _django.setup(
+        args.project, DEBUG=False, ALLOWED_HOSTS=['*'],
+        QUERY_BUDGET_STRICT=False,
+    )
+    logging.disable(logging.CRITICAL)
+    try:
+        _django.migrate()
+        import django
+
+        randomizer = random.Random(args.seed)
+        started = time.perf_counter()
+        scenarios = PROJECTS[args.project](args, randomizer)
+        seed_seconds = time.perf_counter() - started
+        results = {
+            'project': args.project,
+            'commit': git_commit(),
+            'created': datetime.now(timezone.utc).isoformat(
+                timespec='seconds'
+            ),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'db_profile': os.environ.get('DB_PROFILE', 'default'),
+            'params': {
+                key: value for key, value in vars(args).items()
+                if key not in ('project', 'output', 'baseline')
+            },
+            'seed_seconds': round(seed_seconds, 2),
+            'scenarios': {},
+        }
+        print(f'{args.project}: данные заполнены за {seed_seconds:.1f} с')
+        for scenario in scenarios:
+            result = measure(scenario, args.requests, args.warmup)
+            results['scenarios'][scenario.name] = result
+            print(
+                f'  {scenario.name}: p50 {result["p50_ms"]:.2f} мс, '
+                f'p95 {result["p95_ms"]:.2f} мс, '
+                f'p99 {result["p99_ms"]:.2f} мс, '
+                f'запросов к базе {result["queries"]}, '
+                f'память {result["peak_kib"]} КиБ'
+            )
+        # ru_maxrss в Linux — в килобайтах.
+        results['max_rss_kib'] = resource.getrusage(
+            resource.RUSAGE_SELF
+        ).ru_maxrss
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(f'{database}{suffix}'):
+                os.remove(f'{database}{suffix}')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline:
+            compare(results, json.load(baseline))
+
+
+if __name__ == '__main__':
+    main()
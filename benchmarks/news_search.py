@@ -0,0 +1,110 @@
+"""Задержка поиска по новостям в зависимости от размера корпуса.
+
+Корпус наращивается до каждого из размеров --sizes; после каждого шага
+несколько запросов разной избирательности выполняются --repeat раз
+через FTS5 и через перебор icontains, выводятся медиана и 95-й
+перцентиль времени одного запроса.
+
+    python -m benchmarks.news_search --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+from benchmarks import _django
+
+# Словарь достаточно велик, чтобы редкие слова встречались в немногих
+# новостях; первые слова встречаются чаще остальных.
+WORDS = [f'слово{i}' for i in range(5000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+QUERIES = {
+    'редкое слово': 'слово4321',
+    'частое слово': 'слово1',
+    'два слова': 'слово2 слово40',
+    'префикс': 'слово432',
+}
+
+
+def text(randomizer, words):
+    return ' '.join(randomizer.choices(WORDS, WEIGHTS, k=words))
+
+
+def grow(size, comments, randomizer):
+    """Добавляет новости с комментариями до size и индексирует их."""
+    from news import search
+    from news.models import Comment, News
+
+    last_news = News.objects.order_by('pk').last()
+    last_comment = Comment.objects.order_by('pk').last()
+    missing = size - News.objects.count()
+    for start in range(0, missing, 5000):
+        News.objects.bulk_create(
+            News(title=text(randomizer, 5), text=text(randomizer, 60))
+            for _ in range(min(5000, missing - start))
+        )
+    # bulk_create не вызывает сигналов: индексируем новые записи сами.
+    new_news = list(News.objects.filter(
+        pk__gt=last_news.pk if last_news else 0
+    ))
+    search.index_news(new_news)
+    Comment.objects.bulk_create(
+        Comment(news=news, text=text(randomizer, 20))
+        for news in new_news
+        for _ in range(comments)
+    )
+    search.index_comments(Comment.objects.filter(
+        pk__gt=last_comment.pk if last_comment else 0
+    ))
+
+
+def measure(query, repeat):
+    from news import search
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        search.search_news(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000])
+    parser.add_argument('--comments', type=int, default=3,
+                        help='Комментариев на новость.')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    database = _django.setup('news')
+    try:
+        _django.migrate()
+        from news import search
+
+        if not search.fts5_available():
+            raise SystemExit('SQLite собран без FTS5.')
+        randomizer = random.Random(0)
+        for size in args.sizes:
+            grow(size, args.comments, randomizer)
+            print(f'{size} новостей, {size * args.comments} комментариев')
+            for name, query in QUERIES.items():
+                search._fts5 = True
+                fts = measure(query, args.repeat)
+                search._fts5 = False
+                scan = measure(query, args.repeat)
+                print(
+                    f'  {name}: FTS5 {fts[0]:.2f}/{fts[1]:.2f} мс, '
+                    f'icontains {scan[0]:.2f}/{scan[1]:.2f} мс '
+                    '(медиана/p95)'
+                )
+            search._fts5 = True
+    finally:
+        os.remove(database)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Время поиска по заметкам: индекс против перебора через icontains.
+
+Заметки распределяются между авторами поровну; поиск ведётся по
+заметкам одного автора, как в представлении notes:search.
+
+    python -m benchmarks.notes_search --notes 1000000 --authors 1000
+"""
+import argparse
+import os
+import random
+import time
+from io import StringIO
+
+from benchmarks import _django
+
+# Словарь достаточно велик, чтобы слово встречалось в немногих заметках.
+WORDS = [f'слово{i}' for i in range(5000)]
+QUERY = 'слово17 слово1234'
+
+
+def seed(notes, authors):
+    from django.contrib.auth import get_user_model
+    from notes.models import Note
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'user{i}') for i in range(authors)
+    )
+    author_ids = list(User.objects.values_list('id', flat=True))
+    randomizer = random.Random(0)
+    batch = []
+    for i in range(notes):
+        batch.append(Note(
+            title=' '.join(randomizer.sample(WORDS, 3)),
+            text=' '.join(randomizer.choices(WORDS, k=50)),
+            slug=f'n{i}',
+            author_id=author_ids[i % authors],
+        ))
+        if len(batch) == 10000:
+            Note.objects.bulk_create(batch)
+            batch = []
+    Note.objects.bulk_create(batch)
+    return User.objects.get(pk=author_ids[0])
+
+
+def measure(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--notes', type=int, default=100000)
+    parser.add_argument('--authors', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    database = _django.setup('notes')
+    try:
+        _django.migrate()
+        from django.core.management import call_command
+        from notes import search
+        from notes.models import Note
+
+        author = seed(args.notes, args.authors)
+        backends = [search.TermIndexBackend]
+        if search.fts5_available():
+            backends.insert(0, search.Fts5Backend)
+        print(f'{args.notes} заметок, {args.authors} авторов')
+        for backend in backends:
+            search._backend = backend()
+            call_command('rebuild_notes_index', batch_size=10000,
+                         stdout=StringIO())
+            elapsed = measure(
+                lambda: search.search_notes(author, QUERY),
+                args.repeat,
+            )
+            print(f'  {backend.__name__}: {elapsed:.2f} мс')
+        first, second = QUERY.split()
+        elapsed = measure(lambda: list(Note.objects.filter(
+            author=author, text__icontains=first
+        ).filter(text__icontains=second)[:50]), args.repeat)
+        print(f'  icontains: {elapsed:.2f} мс')
+    finally:
+        os.remove(database)
+
+
+if __name__ == '__main__':
+    main()
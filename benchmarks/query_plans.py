@@ -0,0 +1,152 @@
+"""Планы запросов горячих путей до и после составных индексов.
+
+Применяет все миграции, удаляет составные индексы моделей
+(Meta.indexes), заполняет временную базу большим количеством строк
+и выводит EXPLAIN QUERY PLAN для запросов главной страницы, страницы
+новости и списка заметок, затем создаёт индексы заново и выводит
+планы повторно. Заполняется текущая схема: поля, добавленные после
+миграции с индексами, не мешают.
+
+    python -m benchmarks.query_plans news --rows 1000000
+    python -m benchmarks.query_plans notes --rows 1000000
+"""
+import argparse
+import os
+import time
+
+from benchmarks import _django
+
+BATCH_SIZE = 10_000
+
+
+def seed_news(rows):
+    from django.contrib.auth import get_user_model
+    from news.models import Comment, News
+
+    author = get_user_model().objects.create(username='bench')
+    news_rows = max(rows // 100, 1)
+    News.objects.bulk_create(
+        (News(title=f'News {i}', text='Text') for i in range(news_rows)),
+        batch_size=BATCH_SIZE,
+    )
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(news_id=news_ids[i % len(news_ids)], author=author,
+                    text=f'Comment {i}')
+            for i in range(rows)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return news_ids[len(news_ids) // 2]
+
+
+def plans_news(news_id):
+    from news.models import Comment, News
+
+    return {
+        'news:home': News.objects.all()[:10],
+        'news:detail (комментарии)': Comment.objects.filter(
+            news_id=news_id
+        ).order_by('created', 'pk')[:51],
+    }
+
+
+def indexed_news():
+    from news.models import Comment, News
+
+    return [News, Comment]
+
+
+def seed_notes(rows):
+    from django.contrib.auth import get_user_model
+    from notes.models import Note
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'user{i}') for i in range(max(rows // 1000, 1))
+    )
+    users = list(User.objects.all())
+    Note.objects.bulk_create(
+        (
+            Note(title=f'Note {i}', text='Text', slug=f'note-{i}',
+                 author=users[i % len(users)])
+            for i in range(rows)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return users[len(users) // 2].pk
+
+
+def plans_notes(author_id):
+    from notes.models import Note
+
+    return {
+        'notes:list': Note.objects.filter(
+            author_id=author_id
+        ).order_by('id')[:10],
+    }
+
+
+def indexed_notes():
+    from notes.models import Note
+
+    return [Note]
+
+
+PROJECTS = {
+    'news': (indexed_news, seed_news, plans_news),
+    'notes': (indexed_notes, seed_notes, plans_notes),
+}
+
+
+def change_indexes(models, method):
+    """Удаляет или создаёт индексы из Meta.indexes моделей."""
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for model in models:
+            for index in model._meta.indexes:
+                getattr(editor, method)(model, index)
+
+
+def explain(queries):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    for name, queryset in queries.items():
+        started = time.perf_counter()
+        list(queryset)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f'  {name}: {elapsed:.2f} ms')
+        for line in queryset.explain().splitlines():
+            print(f'    {line}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('project', choices=PROJECTS)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    database = _django.setup(args.project)
+    indexed, seed, plans = PROJECTS[args.project]
+    try:
+        _django.migrate()
+        change_indexes(indexed(), 'remove_index')
+        started = time.perf_counter()
+        key = seed(args.rows)
+        print(f'Заполнено {args.rows} строк за '
+              f'{time.perf_counter() - started:.1f} с')
+        print('Без индексов:')
+        explain(plans(key))
+        change_indexes(indexed(), 'add_index')
+        print('С индексами:')
+        explain(plans(key))
+    finally:
+        os.remove(database)
+
+
+if __name__ == '__main__':
+    main()
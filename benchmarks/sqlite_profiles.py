@@ -0,0 +1,137 @@
+"""Конкурентная запись в SQLite: обычный и боевой профили базы.
+
+Профиль (DB_PROFILE=production) читается при импорте настроек, поэтому
+каждый профиль запускается в отдельном процессе со своей временной
+базой. В процессе --writers потоков отправляют формы: комментарии
+к новости (news) или новые заметки (notes). Как и WSGI-сервер, каждый
+запрос начинается и заканчивается close_old_connections(): без
+CONN_MAX_AGE это новое соединение на каждый запрос. Ошибки
+«database is locked» считаются отдельно.
+
+    python -m benchmarks.sqlite_profiles news --writers 8 --requests 2000
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import _django
+
+PROFILES = ('default', 'production')
+
+
+def prepare_news():
+    from django.urls import reverse
+    from news.models import News
+
+    news = News.objects.create(title='Новость', text='Текст')
+    url = reverse('news:detail', kwargs={'pk': news.pk})
+    return url, lambda writer, i: {'text': f'Комментарий {writer}-{i}'}
+
+
+def prepare_notes():
+    from django.urls import reverse
+
+    return reverse('notes:add'), lambda writer, i: {
+        'title': f'Заметка {writer} {i}', 'text': 'Текст',
+    }
+
+
+PROJECTS = {
+    'news': prepare_news,
+    'notes': prepare_notes,
+}
+
+
+def write(project, writers, requests):
+    """Отправляет формы из нескольких потоков, возвращает итоги."""
+    from django.contrib.auth import get_user_model
+    from django.db import close_old_connections, connections
+    from django.test import Client
+
+    url, data = PROJECTS[project]()
+    clients = []
+    for writer in range(writers):
+        client = Client(raise_request_exception=False)
+        client.force_login(
+            get_user_model().objects.create(username=f'writer{writer}')
+        )
+        clients.append(client)
+    connections.close_all()
+
+    def worker(writer):
+        done = failed = 0
+        for i in range(requests // writers):
+            close_old_connections()
+            response = clients[writer].post(url, data(writer, i))
+            close_old_connections()
+            if response.status_code == 302:
+                done += 1
+            else:
+                failed += 1
+        connections.close_all()
+        return done, failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(writers) as pool:
+        results = list(pool.map(worker, range(writers)))
+    elapsed = time.perf_counter() - started
+    done = sum(result[0] for result in results)
+    return {
+        'done': done,
+        'failed': sum(result[1] for result in results),
+        'per_second': done / elapsed,
+    }
+
+
+def run_profile(args):
+    """Тело дочернего процесса: один профиль на своей базе."""
+    database = _django.setup(
+        args.project, DEBUG=False, ALLOWED_HOSTS=['*'],
+        QUERY_BUDGET_STRICT=False,
+    )
+    # Журнал каждого запроса и трассировки ошибок блокировки
+    # только мешали бы читать результат.
+    logging.disable(logging.CRITICAL)
+    try:
+        _django.migrate()
+        print(json.dumps(write(args.project, args.writers, args.requests)))
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(f'{database}{suffix}'):
+                os.remove(f'{database}{suffix}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('project', choices=PROJECTS)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--profile', choices=PROFILES,
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.profile:
+        run_profile(args)
+        return
+
+    print(f'{args.project}: {args.requests} запросов, '
+          f'{args.writers} пишущих потоков')
+    for profile in PROFILES:
+        env = dict(os.environ, DB_PROFILE=profile)
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.sqlite_profiles',
+             args.project, '--writers', str(args.writers),
+             '--requests', str(args.requests), '--profile', profile],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(f'  {profile}: {result["per_second"]:.0f} запр/с, '
+              f'успешно {result["done"]}, ошибок {result["failed"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Время прогона тестов проектов с разными настройками.
+
+Для каждого проекта набор тестов запускается трижды: с основными
+настройками (PBKDF2), с тестовыми (MD5, база в памяти) и с тестовыми,
+разделёнными на --workers частей (--shard I/N), которые идут
+одновременно в отдельных процессах. Каждый вариант повторяется
+--repeat раз, в отчёт идёт лучшее время.
+
+    python -m benchmarks.test_suites --workers 4 --repeat 3
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROJECTS = {
+    'news': (ROOT / 'ya_news', 'yanews'),
+    'notes': (ROOT / 'ya_note', 'yanote'),
+}
+
+
+def pytest_command(settings, *args):
+    return [sys.executable, '-m', 'pytest', '-q', f'--ds={settings}', *args]
+
+
+def run(directory, commands):
+    """Запускает команды одновременно и ждёт всех; возвращает секунды."""
+    started = time.perf_counter()
+    processes = [
+        subprocess.Popen(
+            command, cwd=directory,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        for command in commands
+    ]
+    for command, process in zip(commands, processes):
+        output = process.communicate()[0]
+        if process.returncode:
+            sys.exit(f'{" ".join(command)}:\n{output}')
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('projects', nargs='*', metavar='project',
+                        help=f'Проекты: {", ".join(PROJECTS)} (все).')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for project in args.projects or PROJECTS:
+        if project not in PROJECTS:
+            parser.error(f'неизвестный проект {project!r}')
+        directory, package = PROJECTS[project]
+        variants = {
+            f'{package}.settings': [pytest_command(f'{package}.settings')],
+            f'{package}.settings_test': [
+                pytest_command(f'{package}.settings_test')
+            ],
+            f'{package}.settings_test, {args.workers} процессов': [
+                pytest_command(
+                    f'{package}.settings_test',
+                    f'--shard={index}/{args.workers}',
+                )
+                for index in range(1, args.workers + 1)
+            ],
+        }
+        print(f'{project}:')
+        baseline = None
+        for name, commands in variants.items():
+            best = min(run(directory, commands) for _ in range(args.repeat))
+            baseline = baseline or best
+            print(f'  {name}: {best:.2f} с (x{baseline / best:.1f})')
+
+
+if __name__ == '__main__':
+    main()
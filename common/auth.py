@@ -0,0 +1,105 @@
+"""Пользователь для AuthenticationMiddleware из кеша.
+
+AuthenticationMiddleware загружает пользователя на каждом запросе
+через бэкенд, которым он вошёл; в пределах запроса результат уже
+запоминается в request.user. CachedModelBackend хранит пользователя
+ещё и в кеше между запросами, так что вместе с сессиями cached_db
+запрос авторизованного пользователя при тёплом кеше не обращается
+к базе ради авторизации. Запись в кеше удаляется при каждом
+сохранении и удалении пользователя (смене пароля, блокировке,
+обновлении last_login при входе) и при изменении его групп и прав.
+QuerySet.update() сигналов не вызывает: после него записи нужно
+удалить явно, иначе до истечения AUTH_USER_CACHE_TIMEOUT запросы
+увидят прежнего пользователя. Обработчики сигналов подключает
+connect_signals() из AppConfig.ready() проекта.
+
+В сессии записан путь к бэкенду, которым пользователь вошёл, и сессия
+действует, только пока этот путь есть в AUTHENTICATION_BACKENDS.
+Держать в списке прежний ModelBackend значит проверять пароль при
+неудачном входе дважды, поэтому сессии, выданные прежними бэкендами,
+переводит на CachedModelBackend миграция данных
+(rewrite_session_backends).
+"""
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.sessions.backends.cached_db import KEY_PREFIX
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache, caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+CACHE_KEY = 'auth:user:{}'
+BACKEND = 'common.auth.CachedModelBackend'
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        key = CACHE_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+
+
+def forget_user(sender, instance, **kwargs):
+    cache.delete(CACHE_KEY.format(instance.pk))
+
+
+def forget_related_users(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Обработчик m2m_changed для групп и прав пользователя."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        pks = [instance.pk]
+    elif action == 'pre_clear':
+        pks = instance.user_set.values_list('pk', flat=True)
+    else:
+        pks = pk_set
+    cache.delete_many([CACHE_KEY.format(pk) for pk in pks])
+
+
+def connect_signals():
+    """Подключает сброс кеша к изменениям пользователей, их групп
+    и прав."""
+    user_model = get_user_model()
+    for signal in (post_save, post_delete):
+        signal.connect(
+            forget_user, sender=user_model,
+            dispatch_uid='common.auth.forget_user',
+        )
+    for through in (user_model.groups.through,
+                    user_model.user_permissions.through):
+        m2m_changed.connect(
+            forget_related_users, sender=through,
+            dispatch_uid='common.auth.forget_related_users',
+        )
+
+
+def rewrite_session_backends(*old_backends):
+    """Операция RunPython: действующие сессии, выданные бэкендами
+    old_backends, переводятся на CachedModelBackend.
+
+    Копии сессий в кеше удаляются: иначе cached_db читал бы прежний
+    путь оттуда.
+    """
+    def rewrite(apps, schema_editor):
+        Session = apps.get_model('sessions', 'Session')
+        store = SessionStore()
+        session_cache = caches[settings.SESSION_CACHE_ALIAS]
+        sessions = Session.objects.using(
+            schema_editor.connection.alias
+        ).filter(expire_date__gt=timezone.now())
+        for session in sessions.iterator():
+            data = store.decode(session.session_data)
+            if data.get(BACKEND_SESSION_KEY) not in old_backends:
+                continue
+            data[BACKEND_SESSION_KEY] = BACKEND
+            session.session_data = store.encode(data)
+            session.save(update_fields=['session_data'])
+            session_cache.delete(KEY_PREFIX + session.session_key)
+    return rewrite
@@ -0,0 +1,56 @@
+"""Настройка соединений с SQLite.
+
+PRAGMA из SQLITE_PRAGMAS выполняются при открытии каждого соединения.
+В боевом профиле это журнал WAL (читатели не блокируют писателя),
+synchronous=NORMAL (fsync только при контрольных точках WAL), отображение
+файла в память, увеличенный кеш страниц и ожидание освободившейся
+блокировки вместо немедленной ошибки «database is locked».
+
+Профиль выбирается переменной окружения DB_PROFILE: settings.py проекта
+получает PRAGMA из sqlite_profile(), а обработчик подключает
+connect_signals() из AppConfig.ready().
+"""
+import os
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+
+
+def sqlite_profile(databases):
+    """SQLITE_PRAGMAS для профиля из DB_PROFILE.
+
+    В боевом профиле соединения ещё и переиспользуются между
+    запросами: для этого меняется CONN_MAX_AGE баз из databases.
+    """
+    if os.environ.get('DB_PROFILE') != 'production':
+        return {}
+    for database in databases.values():
+        database['CONN_MAX_AGE'] = 600
+    return dict(PRODUCTION_PRAGMAS)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Обработчик сигнала connection_created.
+
+    PRAGMA выполняются напрямую в sqlite3, мимо курсора Django:
+    это не запросы приложения, и учитывать их в бюджете незачем.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def connect_signals():
+    connection_created.connect(
+        configure_sqlite, dispatch_uid='common.db.configure_sqlite'
+    )
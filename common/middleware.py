@@ -0,0 +1,115 @@
+"""Учёт запросов к базе и времени отрисовки шаблонов.
+
+Для каждого запроса считаются число SQL-запросов, их суммарное время,
+время отрисовки шаблона и общее время обработки. Значения отдаются
+в заголовке Server-Timing, а при QUERY_BUDGET_LOG ещё и пишутся в лог
+уровня INFO. Если для имени URL задан
+бюджет в QUERY_BUDGETS и он превышен, то при QUERY_BUDGET_STRICT
+запрос завершается ошибкой, иначе в лог пишется предупреждение.
+
+Учитываются запросы потока, обрабатывающего запрос: обращения
+к базе из пула потоков асинхронных представлений сюда не попадают.
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем позволяет бюджет."""
+
+
+class QueryRecorder:
+    """Считает запросы и время их выполнения во всех подключениях."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.stack = ExitStack()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+    def __enter__(self):
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+
+class QueryBudgetMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.template_render_time = 0.0
+        started = time.perf_counter()
+        with QueryRecorder() as queries:
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        view_name = (
+            request.resolver_match.view_name
+            if request.resolver_match else None
+        )
+        response['Server-Timing'] = (
+            f'db;dur={queries.duration * 1000:.2f};'
+            f'desc="{queries.count} queries", '
+            f'tpl;dur={request.template_render_time * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}'
+        )
+        if settings.QUERY_BUDGET_LOG:
+            self.log(request, response, view_name, queries, total)
+        self.check_budget(view_name, queries.count)
+        return response
+
+    def log(self, request, response, view_name, queries, total):
+        metrics = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': queries.count,
+            'db_ms': round(queries.duration * 1000, 2),
+            'template_ms': round(request.template_render_time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }
+        logger.info(
+            ' '.join(f'{key}=%s' for key in metrics),
+            *metrics.values(),
+            extra={'metrics': metrics},
+        )
+
+    def process_template_response(self, request, response):
+        """Засекает время отрисовки: Django отрисует ответ сразу после
+        этого хука и вызовет post-render callback."""
+        started = time.perf_counter()
+
+        def finished(response):
+            request.template_render_time = time.perf_counter() - started
+
+        response.add_post_render_callback(finished)
+        return response
+
+    def check_budget(self, view_name, count):
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is None or count <= budget:
+            return
+        message = (
+            f'{view_name}: {count} запросов к базе при бюджете {budget}'
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
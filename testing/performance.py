@@ -0,0 +1,136 @@
+"""Проверки производительности для тестов.
+
+PerformanceBudget — контекстный менеджер: код внутри блока должен
+выполнить не больше max_queries запросов к базе, уложиться в max_ms
+миллисекунд и израсходовать на пике не больше max_kib КиБ памяти.
+При превышении бросается AssertionError со списком запросов и мест
+в коде проекта, откуда они выполнены. В pytest им пользуются через
+фикстуры assert_max_queries и assert_performance из testing.plugin,
+в TestCase — через PerformanceAssertionsMixin.
+
+Время зависит от машины, поэтому бюджеты времени проверяются, только
+если задана переменная окружения PERF_TIME_SCALE, и умножаются на неё:
+на медленном CI можно задать, например, PERF_TIME_SCALE=4.
+
+Как и в QueryBudgetMiddleware, учитываются запросы только текущего
+потока. Пиковую память считает tracemalloc: он замедляет выделение
+памяти, поэтому вместе с бюджетом памяти время получается завышенным.
+"""
+import os
+import time
+import tracemalloc
+import traceback
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+CALL_SITE_DEPTH = 3
+
+
+def call_site():
+    """Ближайшие кадры стека из кода проекта, от внутреннего к внешнему."""
+    base_dir = str(settings.BASE_DIR)
+    frames = []
+    for frame, line in traceback.walk_stack(None):
+        filename = frame.f_code.co_filename
+        if (not filename.startswith(base_dir) or filename == __file__
+                or 'site-packages' in filename):
+            continue
+        frames.append(
+            f'{Path(filename).relative_to(base_dir)}:{line} '
+            f'in {frame.f_code.co_name}'
+        )
+        if len(frames) == CALL_SITE_DEPTH:
+            break
+    return ' <- '.join(frames) or 'вне кода проекта'
+
+
+def scale_time(max_ms):
+    """Бюджет времени с учётом PERF_TIME_SCALE; без неё — не проверяется."""
+    scale = os.environ.get('PERF_TIME_SCALE')
+    if max_ms is None or not scale:
+        return None
+    return max_ms * float(scale)
+
+
+class PerformanceBudget:
+
+    def __init__(self, max_queries=None, max_ms=None, max_kib=None,
+                 label=None):
+        self.max_queries = max_queries
+        self.max_ms = scale_time(max_ms)
+        self.max_kib = max_kib
+        self.label = label
+        self.queries = []
+        self.elapsed_ms = None
+        self.peak_kib = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, call_site()))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        self.started_tracing = (
+            self.max_kib is not None and not tracemalloc.is_tracing()
+        )
+        if self.started_tracing:
+            tracemalloc.start()
+        if self.max_kib is not None:
+            tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.elapsed_ms = (time.perf_counter() - self.started) * 1000
+        if self.max_kib is not None:
+            self.peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+        if self.started_tracing:
+            tracemalloc.stop()
+        self.stack.close()
+        if exc_type is None:
+            self.check()
+
+    def check(self):
+        errors = []
+        if (self.max_queries is not None
+                and len(self.queries) > self.max_queries):
+            errors.append(
+                f'{len(self.queries)} запросов к базе '
+                f'при бюджете {self.max_queries}:'
+            )
+            errors.extend(
+                f'  {number}. {sql}\n     {site}'
+                for number, (sql, site) in enumerate(self.queries, start=1)
+            )
+        if self.max_ms is not None and self.elapsed_ms > self.max_ms:
+            errors.append(
+                f'{self.elapsed_ms:.1f} мс при бюджете {self.max_ms} мс'
+            )
+        if self.max_kib is not None and self.peak_kib > self.max_kib:
+            errors.append(
+                f'{self.peak_kib:.1f} КиБ памяти '
+                f'при бюджете {self.max_kib} КиБ'
+            )
+        if errors:
+            if self.label:
+                errors.insert(0, f'{self.label}:')
+            raise AssertionError('\n'.join(errors))
+
+
+class PerformanceAssertionsMixin:
+    """Проверки бюджета для TestCase:
+
+        with self.assertMaxQueries(3):
+            self.client.get(url)
+    """
+
+    def assertMaxQueries(self, count, label=None):
+        return PerformanceBudget(max_queries=count, label=label)
+
+    def assertPerformance(self, **budgets):
+        return PerformanceBudget(**budgets)
@@ -0,0 +1,70 @@
+"""Плагин pytest, общий для ya_news и ya_note.
+
+Подключается из conftest.py проекта через pytest_plugins. Добавляет
+опцию --shard, фикстуры, нужные каждому тесту обоих проектов,
+и фикстуры проверок производительности.
+"""
+import pytest
+from django.core.cache import cache
+
+from .performance import PerformanceBudget
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Сессии и пользователи лежат в кеше, а он переживает откат
+    транзакции теста."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    settings.QUERY_BUDGET_STRICT = True
+
+
+@pytest.fixture
+def assert_max_queries():
+    """with assert_max_queries(3): ... — при превышении выводит
+    запросы и места в коде, откуда они выполнены."""
+    def _assert_max_queries(count, label=None):
+        return PerformanceBudget(max_queries=count, label=label)
+    return _assert_max_queries
+
+
+@pytest.fixture
+def assert_performance():
+    """with assert_performance(max_queries=3, max_ms=100, max_kib=512)."""
+    return PerformanceBudget
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--shard', metavar='I/N',
+        help='Запустить только I-ю из N частей набора тестов (I с 1).',
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Делит собранные тесты по кругу на N частей: части можно
+    запускать параллельно в отдельных процессах, у каждого своя база
+    в памяти."""
+    shard = config.getoption('shard')
+    if not shard:
+        return
+    try:
+        index, total = map(int, shard.split('/'))
+    except ValueError:
+        raise pytest.UsageError(f'--shard ожидает I/N, получено {shard!r}')
+    if not 1 <= index <= total:
+        raise pytest.UsageError(f'--shard: нужно 1 <= I <= N, а не {shard}')
+    selected = []
+    deselected = []
+    for number, item in enumerate(items):
+        if number % total == index - 1:
+            selected.append(item)
+        else:
+            deselected.append(item)
+    config.hook.pytest_deselected(items=deselected)
+    items[:] = selected
@@ -0,0 +1,16 @@
+"""Настройки тестов, общие для ya_news и ya_note.
+
+settings_test проекта импортирует их поверх основных настроек:
+быстрый хешер паролей и тестовые базы в памяти.
+"""
+# Почти каждый тест создаёт пользователя и входит под ним, а PBKDF2
+# намеренно медленный. MD5 для настоящих паролей не годится, для
+# тестов — в самый раз.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def use_memory_databases(databases):
+    """Тестовая база SQLite и так создаётся в памяти; явное указание
+    защищает от TEST.NAME, заданного в основных настройках."""
+    for database in databases.values():
+        database.setdefault('TEST', {})['NAME'] = ':memory:'
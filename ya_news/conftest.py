@@ -1,11 +1,24 @@
 import pytest
+from news import search
 from news.models import News, Comment
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import F, Max
 from django.test import Client
 
+pytest_plugins = ['testing.plugin']
+
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def read_from_primary(settings):
+    """Реплики в тестах — зеркала default, но отдельное соединение
+    с SQLite не видит данных из транзакции теста."""
+    settings.DATABASE_REPLICAS = []
+
+
 @pytest.fixture
 def client():
     return Client()
@@ -34,3 +47,85 @@ def comment():
             text='Text'),
             author=User.objects.create(username=username, password=password))
     return _create_comment
+
+
+def _created_after(model, last_pk):
+    """bulk_create в SQLite не заполняет pk: созданные объекты
+    перечитываются по первичному ключу, он только растёт."""
+    return list(model.objects.filter(pk__gt=last_pk or 0).order_by('pk'))
+
+
+def _last_pk(model):
+    return model.objects.aggregate(last=Max('pk'))['last']
+
+
+@pytest.fixture(scope='session')
+def make_users():
+    """Создаёт count пользователей одним запросом. Хеш пароля
+    считается один раз и общий для всех."""
+    def _make_users(count, prefix='user', password='password'):
+        last_pk = _last_pk(User)
+        hashed = make_password(password)
+        User.objects.bulk_create(
+            User(username=f'{prefix}{i}', password=hashed)
+            for i in range(count)
+        )
+        return _created_after(User, last_pk)
+    return _make_users
+
+
+@pytest.fixture(scope='session')
+def make_news():
+    """Создаёт count новостей через bulk_create и индексирует их для
+    поиска. Поля из fields одинаковы у всех новостей."""
+    def _make_news(count, **fields):
+        last_pk = _last_pk(News)
+        News.objects.bulk_create(
+            (News(title=f'Новость {i}', text=f'Текст новости {i}', **fields)
+             for i in range(count)),
+            batch_size=1000,
+        )
+        created = _created_after(News, last_pk)
+        search.index_news(created)
+        return created
+    return _make_news
+
+
+@pytest.fixture(scope='session')
+def make_comments():
+    """Создаёт count комментариев к новости через bulk_create.
+    Авторы чередуются по кругу, счётчик комментариев новости
+    и поисковый индекс обновляются так же, как при обычном
+    сохранении."""
+    def _make_comments(news, count, authors):
+        last_pk = _last_pk(Comment)
+        Comment.objects.bulk_create(
+            (Comment(news=news, author=authors[i % len(authors)],
+                     text=f'Комментарий {i}')
+             for i in range(count)),
+            batch_size=1000,
+        )
+        News.objects.filter(pk=news.pk).update(
+            comment_count=F('comment_count') + count,
+            version=F('version') + 1,
+        )
+        news.refresh_from_db()
+        created = _created_after(Comment, last_pk)
+        search.index_comments(created)
+        return created
+    return _make_comments
+
+
+@pytest.fixture(scope='module')
+def shared_db(django_db_setup, django_db_blocker):
+    """Данные, которые модуль тестов создаёт один раз и только читает.
+
+    Module-фикстуры создают данные внутри этой фикстуры, тесты модуля
+    работают в транзакциях, вложенных в её транзакцию, а после
+    последнего теста модуля всё откатывается. Общие данные не видны
+    тестам из других модулей.
+    """
+    with django_db_blocker.unblock():
+        with transaction.atomic():
+            yield
+            transaction.set_rollback(True)
@@ -5,3 +5,13 @@ class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        from common import auth, db
+
+        from . import profanity, signals  # noqa: F401
+        from .forms import BAD_WORDS
+
+        profanity.load(BAD_WORDS)
+        db.connect_signals()
+        auth.connect_signals()
@@ -0,0 +1,94 @@
+"""Асинхронные варианты страниц новостей для запуска под ASGI.
+
+ORM в Django синхронный, поэтому каждое обращение к базе выполняется
+в отдельном пуле потоков ограниченного размера (NEWS_ASYNC_DB_WORKERS),
+а цикл событий тем временем обслуживает другие запросы. Django 3.2
+не поддерживает асинхронные методы в CBV, поэтому это функции.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+
+from .forms import CommentForm
+from .models import News
+from .pagination import get_comments_page
+from .views import NewsComment, NewsDetail, NewsList
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.NEWS_ASYNC_DB_WORKERS,
+            thread_name_prefix='news-db',
+        )
+    return _executor
+
+
+def _call(func, *args, **kwargs):
+    """Выполняет функцию так же, как Django выполняет запрос:
+    с закрытием устаревших соединений до и после."""
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_db_thread(func, *args, **kwargs):
+    """Выполняет синхронную функцию в пуле потоков для работы с базой.
+
+    run_in_executor не переносит контекстные переменные в поток,
+    поэтому контекст копируется явно: иначе потерялось бы, например,
+    закрепление чтения за основной базой.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(context.run, _call, func, *args, **kwargs),
+    )
+
+
+def _is_authenticated(request):
+    return request.user.is_authenticated
+
+
+async def news_list(request):
+    """Главная страница."""
+    object_list = await run_in_db_thread(
+        list, NewsList(request=request).get_queryset()
+    )
+    return TemplateResponse(request, NewsList.template_name, {
+        'object_list': object_list,
+        NewsList.context_object_name: object_list,
+    })
+
+
+async def news_detail(request, pk):
+    """Страница новости: новость, первая страница комментариев и
+    пользователь загружаются параллельно."""
+    if request.method == 'POST':
+        return await run_in_db_thread(NewsComment.as_view(), request, pk=pk)
+    news, (comments, next_cursor), is_authenticated = await asyncio.gather(
+        run_in_db_thread(get_object_or_404, News, pk=pk),
+        run_in_db_thread(get_comments_page, pk, request.GET.get('after')),
+        run_in_db_thread(_is_authenticated, request),
+    )
+    context = {
+        'object': news,
+        'news': news,
+        'comments': comments,
+        'next_cursor': next_cursor,
+    }
+    if is_authenticated:
+        context['form'] = CommentForm()
+    return TemplateResponse(request, NewsDetail.template_name, context)
@@ -0,0 +1,39 @@
+"""Кеш главной страницы для анонимных пользователей.
+
+Ключ страницы состоит из версии, которую сбрасывают сигналы при любом
+изменении новостей и комментариев, и из pk/даты самой свежей новости.
+"""
+import uuid
+
+from django.core.cache import cache
+
+from .models import News
+
+HOME_VERSION_KEY = 'news:home:version'
+
+
+def get_home_version():
+    """Текущая версия главной страницы.
+
+    Если версии в кеше нет, создаётся новая уникальная: так страницы,
+    сохранённые под вытесненной версией, уже не будут прочитаны.
+    """
+    version = cache.get(HOME_VERSION_KEY)
+    if version is None:
+        cache.add(HOME_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(HOME_VERSION_KEY)
+    return version
+
+
+def invalidate_home_page():
+    """Делает недействительными все сохранённые копии главной страницы."""
+    cache.delete(HOME_VERSION_KEY)
+
+
+def get_home_page_key():
+    """Ключ кеша главной страницы."""
+    latest = News.objects.order_by('-date', '-pk').values_list(
+        'pk', 'date'
+    ).first()
+    pk, date = latest if latest else (None, None)
+    return f'news:home:{get_home_version()}:{pk}:{date}'
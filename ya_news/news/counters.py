@@ -0,0 +1,25 @@
+"""Пересчёт счётчика комментариев у новостей."""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, News
+
+
+def actual_comment_count():
+    """Выражение для UPDATE новостей: текущее число комментариев."""
+    return Coalesce(Subquery(
+        Comment.objects.filter(news=OuterRef('pk')).order_by()
+        .values('news').annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def recount_comments(news_ids):
+    """Пересчитывает счётчик и увеличивает версию новостей одним UPDATE.
+
+    Счётчик считается заново, а не уменьшается: так он не уйдёт ниже
+    нуля, даже если до этого разошёлся с числом комментариев.
+    """
+    return News.objects.filter(pk__in=news_ids).update(
+        comment_count=actual_comment_count(),
+        version=F('version') + 1,
+    )
@@ -0,0 +1,118 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+
+from news import profanity, search
+from news.caching import invalidate_home_page
+from news.counters import recount_comments
+from news.models import Comment
+from yanews.routers import pin_to_primary
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет существующие комментарии по списку запрещённых слов '
+        'и помечает или удаляет нарушителей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete', action='store_true',
+            help='Удалять комментарии вместо пометки is_flagged.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько комментариев читать из базы за один запрос.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько нарушителей помечать или удалять за один запрос.',
+        )
+        parser.add_argument(
+            '--checkpoint', type=Path,
+            help=(
+                'Файл с pk последнего обработанного комментария. '
+                'Если файл есть, прерванная проверка продолжается с этого '
+                'места; после полной проверки файл удаляется.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        # Команда пишет по результатам чтения: реплика могла отстать.
+        with pin_to_primary():
+            self.run(**options)
+
+    def run(self, **options):
+        self.delete = options['delete']
+        self.checkpoint = options['checkpoint']
+        bad_words = profanity.get_filter()
+        last_pk = self.read_checkpoint()
+        scanned = moderated = 0
+        offenders = []
+        comments = Comment.objects.all()
+        if not self.delete:
+            comments = comments.filter(is_flagged=False)
+        # Читаем окнами по pk, а не одним курсором: SQLite не изолирует
+        # открытый курсор от записи в ту же таблицу.
+        while True:
+            chunk = list(
+                comments.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'text')[:options['chunk_size']]
+            )
+            if not chunk:
+                break
+            for pk, text in chunk:
+                if bad_words.search(text):
+                    offenders.append(pk)
+                if len(offenders) >= options['batch_size']:
+                    moderated += self.moderate(offenders, pk)
+                    offenders = []
+            scanned += len(chunk)
+            last_pk = chunk[-1][0]
+            moderated += self.moderate(offenders, last_pk)
+            offenders = []
+        # Проверка дошла до конца: следующий запуск, например после
+        # пополнения списка слов, должен проверить все комментарии.
+        self.clear_checkpoint()
+        action = 'Удалено' if self.delete else 'Помечено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено комментариев: {scanned}. {action}: {moderated}.'
+        ))
+
+    def moderate(self, pks, last_pk):
+        """Обрабатывает пачку нарушителей и сохраняет контрольную точку."""
+        if pks:
+            queryset = Comment.objects.filter(pk__in=pks)
+            if self.delete:
+                self.delete_batch(queryset, pks)
+            else:
+                queryset.update(is_flagged=True)
+        self.write_checkpoint(last_pk)
+        return len(pks)
+
+    @transaction.atomic
+    def delete_batch(self, queryset, pks):
+        """Удаляет пачку без сигналов post_delete, которые пересчитывали
+        бы счётчик и индекс для каждой строки: счётчики, поисковый
+        индекс и кеш главной обновляются один раз на пачку. На
+        комментарии не ссылаются другие модели, так что каскада нет."""
+        news_ids = set(queryset.values_list('news_id', flat=True))
+        queryset._raw_delete(router.db_for_write(Comment))
+        search.remove_comments(pks)
+        recount_comments(news_ids)
+        invalidate_home_page()
+
+    def read_checkpoint(self):
+        if self.checkpoint and self.checkpoint.exists():
+            return int(self.checkpoint.read_text())
+        return 0
+
+    def write_checkpoint(self, pk):
+        if self.checkpoint:
+            self.checkpoint.write_text(str(pk))
+
+    def clear_checkpoint(self):
+        if self.checkpoint:
+            self.checkpoint.unlink(missing_ok=True)
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from news import search
+from news.models import Comment, News
+from yanews.routers import pin_to_primary
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс по новостям и комментариям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько записей читать и индексировать за один запрос.',
+        )
+
+    def handle(self, *args, **options):
+        # Команда пишет по результатам чтения: реплика могла отстать.
+        with pin_to_primary():
+            self.run(**options)
+
+    def run(self, **options):
+        if not search.fts5_available():
+            raise CommandError('В базе нет таблиц FTS5: индекс не нужен.')
+        self.batch_size = options['batch_size']
+        # Одна транзакция: до её завершения поиск видит старый индекс.
+        with transaction.atomic():
+            search.clear_index()
+            news = self.reindex(
+                News.objects.only('id', 'title', 'text'), search.index_news
+            )
+            comments = self.reindex(
+                Comment.objects.only('id', 'news_id', 'text'),
+                search.index_comments,
+            )
+        self.stdout.write(
+            f'Проиндексировано новостей: {news}, комментариев: {comments}.'
+        )
+
+    def reindex(self, queryset, index):
+        """Индексирует записи окнами по pk, не загружая таблицу целиком."""
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by('pk')[:self.batch_size]
+            )
+            if not batch:
+                return total
+            index(batch)
+            total += len(batch)
+            last_pk = batch[-1].pk
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from news.counters import actual_comment_count
+from news.models import News
+from yanews.routers import pin_to_primary
+
+
+class Command(BaseCommand):
+    help = (
+        'Находит новости, у которых comment_count разошёлся с числом '
+        'комментариев, и пересчитывает счётчик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько новостей проверять за один запрос.',
+        )
+
+    def handle(self, *args, **options):
+        # Команда пишет по результатам чтения: реплика могла отстать.
+        with pin_to_primary():
+            self.run(**options)
+
+    def run(self, **options):
+        # Пересчёт — один UPDATE с подзапросом: комментарий, добавленный
+        # между проверкой и исправлением, всё равно будет учтён.
+        actual = actual_comment_count()
+        last_pk = 0
+        checked = repaired = 0
+        while True:
+            window = list(
+                News.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not window:
+                break
+            drifted = list(
+                News.objects.filter(pk__gte=window[0], pk__lte=window[-1])
+                .annotate(actual=Count('comment'))
+                .exclude(comment_count=F('actual'))
+                .values_list('pk', flat=True)
+            )
+            if drifted:
+                repaired += News.objects.filter(pk__in=drifted).update(
+                    comment_count=actual
+                )
+            checked += len(window)
+            last_pk = window[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено новостей: {checked}. Исправлено: {repaired}.'
+        ))
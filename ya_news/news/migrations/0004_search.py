@@ -0,0 +1,43 @@
+from django.db import OperationalError, migrations
+
+
+def create_fts_tables(apps, schema_editor):
+    """FTS5 есть не в каждой сборке SQLite: без него поиск
+    перебирает таблицы."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE news_news_fts USING fts5(title, text)'
+        )
+    except OperationalError:
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE news_comment_fts '
+        'USING fts5(news_id UNINDEXED, text)'
+    )
+    schema_editor.execute(
+        'INSERT INTO news_news_fts(rowid, title, text) '
+        'SELECT id, title, text FROM news_news'
+    )
+    schema_editor.execute(
+        'INSERT INTO news_comment_fts(rowid, news_id, text) '
+        'SELECT id, news_id, text FROM news_comment'
+    )
+
+
+def drop_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS news_news_fts')
+        schema_editor.execute('DROP TABLE IF EXISTS news_comment_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_comment_is_flagged'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_tables, drop_fts_tables),
+    ]
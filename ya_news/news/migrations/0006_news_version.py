@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -1,22 +1,49 @@
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    # Поддерживается сигналами при добавлении и удалении комментариев,
+    # расхождения исправляет команда reconcile_comment_counts.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Меняется при любом изменении новости и комментариев к ней:
+    # по версии строится ETag страницы новости.
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date', '-id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """Версия увеличивается выражением F(), чтобы параллельные
+        сохранения не получили одну и ту же версию; затем новое
+        значение перечитывается из базы."""
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        version = self.version
+        self.version = models.F('version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.version = version
+            raise
+        self.refresh_from_db(using=self._state.db, fields=['version'])
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -31,9 +58,21 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    is_flagged = models.BooleanField(default=False)
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    def save(self, *args, **kwargs):
+        """Счётчик комментариев у новости обновляется обработчиком
+        post_save в той же транзакции, что и сам комментарий."""
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
@@ -0,0 +1,62 @@
+"""Курсорная (keyset) пагинация комментариев к новости.
+
+Курсор указывает на последний показанный комментарий: пару
+(created, id). Следующая страница выбирается условием
+«строго после курсора», поэтому стоимость запроса не зависит от того,
+насколько далеко пользователь пролистал обсуждение.
+"""
+import base64
+import binascii
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment
+
+CommentPage = namedtuple('CommentPage', ('comments', 'next_cursor'))
+
+INVALID_CURSOR = 'Некорректный курсор пагинации.'
+
+
+def encode_cursor(comment):
+    """Кодирует позицию комментария в строку для URL."""
+    raw = f'{comment.created.isoformat()}|{comment.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает пару (created, id), закодированную в курсоре."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created, pk = (
+            base64.urlsafe_b64decode(padded).decode().split('|')
+        )
+        created, pk = parse_datetime(created), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BadRequest(INVALID_CURSOR)
+    if created is None:
+        raise BadRequest(INVALID_CURSOR)
+    return created, pk
+
+
+def get_comments_page(news, cursor=None, size=None):
+    """Возвращает страницу комментариев к новости, идущую после курсора."""
+    if size is None:
+        size = settings.COMMENTS_COUNT_ON_NEWS_PAGE
+    queryset = Comment.objects.filter(
+        news=news
+    ).select_related('author').order_by('created', 'pk')
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    comments = list(queryset[:size + 1])
+    next_cursor = None
+    if len(comments) > size:
+        comments = comments[:size]
+        next_cursor = encode_cursor(comments[-1])
+    return CommentPage(comments, next_cursor)
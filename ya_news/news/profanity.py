@@ -0,0 +1,141 @@
+"""Поиск запрещённых слов в комментариях.
+
+Список слов компилируется один раз в автомат, поэтому проверка
+комментария занимает время, линейное по длине текста, и не зависит
+от размера списка. Движок выбирается настройкой NEWS_BAD_WORDS_ENGINE,
+дополнительный список слов читается из файла NEWS_BAD_WORDS_FILE
+и перечитывается при его изменении.
+"""
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class AhoCorasickMatcher:
+    """Автомат Ахо — Корасик по списку слов."""
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.terminal = [False]
+        for word in words:
+            self._add(word)
+        self._link()
+
+    def _add(self, word):
+        state = 0
+        for symbol in word:
+            next_state = self.transitions[state].get(symbol)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions.append({})
+                self.terminal.append(False)
+                self.transitions[state][symbol] = next_state
+            state = next_state
+        self.terminal[state] = True
+
+    def _link(self):
+        """Вычисляет суффиксные ссылки обходом бора в ширину.
+
+        Благодаря им поиск не возвращается назад по тексту и делает
+        амортизированно O(1) переходов на символ.
+        """
+        fail = [0] * len(self.transitions)
+        queue = list(self.transitions[0].values())
+        for state in queue:
+            for symbol, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and symbol not in self.transitions[fallback]:
+                    fallback = fail[fallback]
+                target = self.transitions[fallback].get(symbol, 0)
+                fail[next_state] = target if target != next_state else 0
+                self.terminal[next_state] = (
+                    self.terminal[next_state]
+                    or self.terminal[fail[next_state]]
+                )
+        self.fail = fail
+
+    def search(self, text):
+        state = 0
+        transitions, fail = self.transitions, self.fail
+        terminal = self.terminal
+        for symbol in text:
+            while state and symbol not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(symbol, 0)
+            if terminal[state]:
+                return True
+        return False
+
+
+class RegexMatcher:
+    """Одно скомпилированное регулярное выражение по списку слов."""
+
+    def __init__(self, words):
+        words = sorted(words, key=len, reverse=True)
+        self.pattern = (
+            re.compile('|'.join(map(re.escape, words))) if words else None
+        )
+
+    def search(self, text):
+        return bool(self.pattern and self.pattern.search(text))
+
+
+class BadWordsFilter:
+    """Проверяет текст по встроенному списку слов и списку из файла."""
+
+    def __init__(self, words, path=None, engine=AhoCorasickMatcher):
+        self.words = words
+        self.path = path
+        self.engine = engine
+        self.mtime = None
+        self.lock = threading.Lock()
+        self.reload()
+
+    def read_file(self):
+        with open(self.path, encoding='utf-8') as file:
+            return [
+                line.strip() for line in file
+                if line.strip() and not line.startswith('#')
+            ]
+
+    def reload(self):
+        """Пересобирает автомат по актуальному списку слов."""
+        with self.lock:
+            words = set(self.words)
+            if self.path:
+                self.mtime = os.stat(self.path).st_mtime_ns
+                words.update(self.read_file())
+            self.matcher = self.engine(
+                {word.lower() for word in words if word}
+            )
+
+    def reload_if_changed(self):
+        if self.path and os.stat(self.path).st_mtime_ns != self.mtime:
+            self.reload()
+
+    def search(self, text):
+        """Есть ли в тексте хотя бы одно запрещённое слово."""
+        self.reload_if_changed()
+        return self.matcher.search(text.lower())
+
+
+_filter = None
+
+
+def load(words):
+    """Собирает фильтр по настройкам проекта; вызывается при старте."""
+    global _filter
+    _filter = BadWordsFilter(
+        words,
+        path=settings.NEWS_BAD_WORDS_FILE,
+        engine=import_string(settings.NEWS_BAD_WORDS_ENGINE),
+    )
+    return _filter
+
+
+def get_filter():
+    return _filter
@@ -1,17 +1,18 @@
+from datetime import date, timedelta
 from http import HTTPStatus
 from django.urls import reverse
 import pytest
 from django.test import Client
 from django.contrib.auth.models import User
 from yanews import settings
-from news.models import Comment
+from news import search
+from news.models import Comment, News
 
 
 @pytest.mark.django_db
-def test_news(news):
+def test_news(make_news):
     """Проверка, что домашняя страница отображает до 10 новостей."""
-    for i in range(11):
-        news()
+    make_news(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
     client = Client()
     url = reverse('news:home')
     response = client.get(url)
@@ -26,6 +27,10 @@ def test_sorted_news(news):
     news_3 = news()
     news_2 = news()
     news_1 = news()
+    today = date.today()
+    for days, item in enumerate((news_3, news_2, news_1)):
+        item.date = today - timedelta(days=days)
+        item.save()
     client = Client()
     response = client.get(reverse('news:home'))
     context = response.context['context']
@@ -77,3 +82,195 @@ def test_comment_form_accessible_to_authenticated_user(news):
     response = client.get(reverse('news:detail', kwargs={'pk': news.pk}))
     assert response.status_code == HTTPStatus.OK
     assert 'form' in response.context
+
+
+@pytest.mark.django_db
+def test_home_comment_count_single_query(make_news, make_users,
+                                         make_comments,
+                                         django_assert_num_queries):
+    """Количество комментариев на главной читается из поля новости,
+    без соединения с комментариями (второй запрос — ключ кеша
+    страницы)."""
+    news, = make_news(1)
+    make_comments(news, 50, make_users(1))
+    client = Client()
+    with django_assert_num_queries(2) as captured:
+        response = client.get(reverse('news:home'))
+    assert not any(
+        'JOIN' in query['sql'] for query in captured.captured_queries
+    )
+    assert response.context['context'][0].comment_count == 50
+    assert 'Комментариев: 50' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_comments_paginated_by_cursor(news, settings):
+    """Комментарии на странице новости выводятся порциями, следующая
+    порция запрашивается по курсору и продолжает предыдущую."""
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 2
+    news = news()
+    user = User.objects.create_user(username='name', password='password')
+    comments = [
+        Comment.objects.create(news=news, author=user, text=f'Comment {i}')
+        for i in range(3)
+    ]
+    client = Client()
+    url = reverse('news:detail', kwargs={'pk': news.pk})
+    response = client.get(url)
+    assert response.context['comments'] == comments[:2]
+    cursor = response.context['next_cursor']
+    assert cursor
+    response = client.get(url, {'after': cursor})
+    assert response.context['comments'] == comments[2:]
+    assert response.context['next_cursor'] is None
+    response = client.get(
+        reverse('news:comments', kwargs={'pk': news.pk}), {'after': cursor}
+    )
+    assert response.status_code == HTTPStatus.OK
+    page = response.json()
+    assert [comment['id'] for comment in page['comments']] == [
+        comments[2].pk
+    ]
+    assert page['next_cursor'] is None
+
+
+@pytest.mark.django_db
+def test_comments_invalid_cursor(news):
+    """Некорректный курсор приводит к ошибке 400."""
+    news = news()
+    client = Client()
+    response = client.get(
+        reverse('news:comments', kwargs={'pk': news.pk}), {'after': '!!!'}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.fixture(params=('locmem', 'filebased'))
+def cache_backend(request, settings, tmp_path):
+    backends = {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'filebased': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        },
+    }
+    settings.CACHES = {'default': backends[request.param]}
+
+
+@pytest.mark.django_db
+def test_home_page_cached_and_invalidated(cache_backend, news,
+                                          django_assert_num_queries):
+    """Главная страница отдаётся из кеша, а новый комментарий сбрасывает
+    кеш, поэтому количество комментариев не устаревает."""
+    news = news()
+    client = Client()
+    url = reverse('news:home')
+    client.get(url)
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert 'Комментариев' not in response.content.decode()
+    user = User.objects.create_user(username='name', password='password')
+    Comment.objects.create(news=news, author=user, text='Comment')
+    response = client.get(url)
+    assert 'Комментариев: 1' in response.content.decode()
+
+
+@pytest.fixture(params=('fts5', 'icontains'))
+def search_backend(request, db, monkeypatch):
+    if request.param == 'fts5' and not search.fts5_available():
+        pytest.skip('SQLite собран без FTS5')
+    if request.param == 'icontains':
+        monkeypatch.setattr(search, '_fts5', False)
+    return request.param
+
+
+def test_missing_fts5_not_remembered(monkeypatch):
+    """Отсутствие таблиц FTS5 не запоминается: после миграции поиск
+    переходит на FTS5."""
+    monkeypatch.setattr(search, '_fts5', None)
+    monkeypatch.setattr(search, 'fts5_available', lambda: False)
+    assert not search.use_fts5()
+    monkeypatch.setattr(search, 'fts5_available', lambda: True)
+    assert search.use_fts5()
+    monkeypatch.setattr(search, 'fts5_available', lambda: False)
+    assert search.use_fts5()
+
+
+def test_search_news_and_comments(search_backend):
+    """Поиск находит новости по заголовку, тексту и комментариям;
+    совпадение в заголовке важнее совпадения в тексте, а совпадение
+    в комментарии — наименее важно."""
+    in_title = News.objects.create(title='Мэр: выборы', text='Текст')
+    in_text = News.objects.create(title='Город', text='Итоги: выборы')
+    commented = News.objects.create(title='Погода', text='Дождь')
+    Comment.objects.create(news=commented, text='При чём тут выборы?')
+    News.objects.create(title='Спорт', text='Матч')
+    response = Client().get(reverse('news:search'), {'q': 'выборы'})
+    assert response.status_code == HTTPStatus.OK
+    found = list(response.context['object_list'])
+    if search_backend == 'fts5':
+        assert found == [in_title, in_text, commented]
+    else:
+        assert set(found) == {in_title, in_text, commented}
+
+
+def test_search_paginated(search_backend, settings):
+    """Результаты поиска выводятся страницами."""
+    settings.NEWS_SEARCH_RESULTS_ON_PAGE = 2
+    for i in range(3):
+        News.objects.create(title=f'{i}: новость', text='Текст')
+    client = Client()
+    url = reverse('news:search')
+    first = client.get(url, {'q': 'новость'}).context
+    second = client.get(url, {'q': 'новость', 'page': 2}).context
+    assert len(first['object_list']) == 2
+    assert first['next_page'] == 2
+    assert len(second['object_list']) == 1
+    assert second['next_page'] is None
+    response = client.get(url, {'q': 'новость', 'page': 'x'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_detail_conditional_get(news):
+    """Страница новости отдаёт 304, пока не изменились ни новость,
+    ни комментарии к ней; ETag у разных пользователей разный."""
+    news = news()
+    url = reverse('news:detail', kwargs={'pk': news.pk})
+    client = Client()
+
+    def etag():
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        return response['ETag']
+
+    first = etag()
+    response = client.get(url, HTTP_IF_NONE_MATCH=first)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not response.content
+    comment = Comment.objects.create(news=news, text='Первый')
+    tags = {first, etag()}
+    comment.text = 'Исправленный'
+    comment.save()
+    tags.add(etag())
+    comment.delete()
+    tags.add(etag())
+    news.title = 'Новый заголовок'
+    news.save()
+    tags.add(etag())
+    news.title = 'Ещё заголовок'
+    news.save(update_fields=['title'])
+    assert news.version == News.objects.get(pk=news.pk).version
+    tags.add(etag())
+    client.force_login(User.objects.create(username='reader'))
+    tags.add(etag())
+    assert len(tags) == 7
+    # Первый ответ вошедшему пользователю выставил CSRF-cookie.
+    first = etag()
+    response = client.get(url, HTTP_IF_NONE_MATCH=first)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    del client.cookies['csrftoken']
+    assert etag() != first
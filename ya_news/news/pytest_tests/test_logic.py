@@ -1,11 +1,27 @@
+import os
+from io import StringIO
+
 import pytest
-from django.contrib.auth.models import User
-from django.test import Client
+from django.apps import apps
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from news.forms import CommentForm
 from news.models import Comment, News
 from news.forms import BAD_WORDS, WARNING
+from news import profanity, search
+from news.profanity import AhoCorasickMatcher, RegexMatcher
 from pytest_django.asserts import assertFormError
+from common.auth import (CACHE_KEY, CachedModelBackend,
+                         rewrite_session_backends)
+from yanews.routers import (PIN_COOKIE, ReplicaPinMiddleware, ReplicaRouter,
+                            is_pinned, pin_to_primary)
 from random import choice
 
 
@@ -82,3 +98,369 @@ def test_authenticated_user_can_edit_or_delete_own_comments():
     assert response.status_code == 404
     response = client.get(reverse('news:delete', kwargs={'pk': comment.pk}))
     assert response.status_code == 404
+
+
+@pytest.mark.parametrize('engine', (AhoCorasickMatcher, RegexMatcher))
+def test_bad_words_matchers(engine):
+    """Оба движка находят слова, в том числе пересекающиеся
+    и вложенные друг в друга."""
+    matcher = engine({'he', 'she', 'hers', 'his'})
+    assert matcher.search('ushers')
+    assert matcher.search('this')
+    assert matcher.search('ahishe')
+    assert not matcher.search('hxsxe')
+    assert not engine(set()).search('anything')
+
+
+@pytest.mark.django_db
+def test_bad_words_reloaded_from_file(tmp_path, settings):
+    """Список запрещённых слов дополняется из файла и перечитывается
+    при его изменении."""
+    path = tmp_path / 'bad_words.txt'
+    path.write_text('# модерация\nкапуста\n', encoding='utf-8')
+    settings.NEWS_BAD_WORDS_FILE = str(path)
+    bad_words = profanity.load(BAD_WORDS)
+    try:
+        assert bad_words.search('Кислая КАПУСТА')
+        assert bad_words.search(BAD_WORDS[0])
+        assert not bad_words.search('морковка')
+        path.write_text('морковка\n', encoding='utf-8')
+        os.utime(path, ns=(0, bad_words.mtime + 1))
+        assert bad_words.search('морковка')
+        assert not bad_words.search('капуста')
+        form = CommentForm(data={'text': 'Морковка!'})
+        assert not form.is_valid()
+        assert form.errors['text'] == [WARNING]
+    finally:
+        settings.NEWS_BAD_WORDS_FILE = None
+        profanity.load(BAD_WORDS)
+
+
+@pytest.mark.django_db
+def test_moderate_comments_command(tmp_path):
+    """Команда модерации помечает или удаляет комментарии с запрещёнными
+    словами пачками и продолжает работу с контрольной точки."""
+    news = News.objects.create(title='Title', text='Text')
+    comments = [
+        Comment.objects.create(news=news, text=text)
+        for text in ('Хорошо', f'Ты {BAD_WORDS[0]}!', 'Отлично',
+                     BAD_WORDS[1].upper(), BAD_WORDS[2])
+    ]
+    checkpoint = tmp_path / 'checkpoint'
+    checkpoint.write_text(str(comments[1].pk))
+    call_command('moderate_comments', '--checkpoint', str(checkpoint),
+                 '--chunk-size', '2', '--batch-size', '1', stdout=StringIO())
+    flagged = set(
+        Comment.objects.filter(is_flagged=True).values_list('pk', flat=True)
+    )
+    assert flagged == {comments[3].pk, comments[4].pk}
+    # После полной проверки контрольная точка удаляется, и повторный
+    # запуск с тем же --checkpoint проверяет все комментарии.
+    assert not checkpoint.exists()
+    call_command('moderate_comments', '--checkpoint', str(checkpoint),
+                 stdout=StringIO())
+    assert Comment.objects.filter(is_flagged=True).count() == 3
+    with CaptureQueriesContext(connection) as captured:
+        call_command('moderate_comments', '--delete', stdout=StringIO())
+    assert list(Comment.objects.all()) == [comments[0], comments[2]]
+    news.refresh_from_db(fields=('comment_count',))
+    assert news.comment_count == 2
+    # Пачка удаляется, пересчитывается и убирается из индекса
+    # одним запросом на каждое действие, а не на каждую строку.
+    assert [
+        query['sql'].split()[0] for query in captured.captured_queries
+        if query['sql'].startswith(('DELETE', 'UPDATE'))
+    ] == ['DELETE', 'DELETE', 'UPDATE']
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments():
+    """
+    Счётчик комментариев у новости меняется при добавлении и удалении
+    комментария, в том числе каскадном, а расхождения исправляет
+    команда reconcile_comment_counts.
+    """
+    def count(news):
+        news.refresh_from_db(fields=('comment_count',))
+        return news.comment_count
+
+    user = User.objects.create_user(username='NAME', password='PASS')
+    news = News.objects.create(title='Title', text='Text')
+    other = News.objects.create(title='Title', text='Text')
+    client = Client()
+    client.force_login(user)
+    client.post(reverse('news:detail', kwargs={'pk': news.pk}),
+                {'text': 'Первый'})
+    second = Comment.objects.create(news=news, author=user, text='Второй')
+    Comment.objects.create(news=other, author=user, text='Третий')
+    assert count(news) == 2
+    client.post(reverse('news:delete', kwargs={'pk': second.pk}))
+    assert count(news) == 1
+    user.delete()
+    assert (count(news), count(other)) == (0, 0)
+    Comment.objects.bulk_create(
+        Comment(news=news, text=str(i)) for i in range(3)
+    )
+    News.objects.filter(pk=other.pk).update(comment_count=5)
+    call_command('reconcile_comment_counts', '--batch-size', '1',
+                 stdout=StringIO())
+    assert (count(news), count(other)) == (3, 0)
+
+
+@pytest.mark.django_db
+def test_comment_delete_recounts_once_per_news():
+    """
+    Удаление пересчитывает счётчик, а не уменьшает его: разошедшийся
+    счётчик не уходит ниже нуля. Пакетное удаление пересчитывает его
+    один раз на новость, удаление новости — ни разу.
+    """
+    def recounts(captured):
+        return sum(
+            query['sql'].startswith('UPDATE "news_news"')
+            for query in captured.captured_queries
+        )
+
+    user = User.objects.create(username='NAME')
+    news = News.objects.create(title='Title', text='Text')
+    other = News.objects.create(title='Title', text='Text')
+    Comment.objects.bulk_create(
+        Comment(news=item, author=user, text=str(i))
+        for item in (news, other) for i in range(3)
+    )
+    Comment.objects.filter(news=news).first().delete()
+    news.refresh_from_db(fields=('comment_count',))
+    assert news.comment_count == 2
+    with CaptureQueriesContext(connection) as captured:
+        user.delete()
+    assert recounts(captured) == 2
+    Comment.objects.bulk_create(
+        Comment(news=other, text=str(i)) for i in range(3)
+    )
+    with CaptureQueriesContext(connection) as captured:
+        other.delete()
+    assert recounts(captured) == 0
+
+
+@pytest.mark.django_db
+def test_search_index_follows_changes():
+    """
+    Поисковый индекс обновляется при изменении и удалении новостей
+    и комментариев и заново строится командой.
+    """
+    if not search.fts5_available():
+        pytest.skip('SQLite собран без FTS5')
+
+    def found(query):
+        return search.search_news(query).news
+
+    news = News.objects.create(title='Заголовок', text='Текст')
+    comment = Comment.objects.create(news=news, text='Первый')
+    comment.text = 'Исправленный'
+    comment.save()
+    assert found('первый') == []
+    assert found('исправленный') == [news]
+    comment.delete()
+    assert found('исправленный') == []
+    search.clear_index()
+    assert found('заголовок') == []
+    call_command('rebuild_news_index', batch_size=1, stdout=StringIO())
+    assert found('заголовок') == [news]
+    news.delete()
+    assert found('заголовок') == []
+
+
+def test_replica_router(settings):
+    """
+    Чтение новостей идёт с реплик, запись и остальные модели —
+    на основную базу; закреплённое чтение — тоже на основную.
+    """
+    settings.DATABASE_REPLICAS = ['replica1', 'replica2']
+    router = ReplicaRouter()
+    assert router.db_for_read(News) in settings.DATABASE_REPLICAS
+    assert router.db_for_read(User) is None
+    assert router.db_for_write(Comment) == 'default'
+    with pin_to_primary():
+        assert router.db_for_read(News) is None
+    saved = News(pk=1)
+    saved._state.db = 'default'
+    assert router.db_for_read(News, instance=saved) == 'default'
+    assert router.allow_migrate('replica1', 'news') is False
+    assert router.allow_migrate('default', 'news') is None
+
+
+@pytest.mark.skipif(
+    not {'replica1', 'replica2'} <= set(connections),
+    reason='Реплики-зеркала заданы только в settings_test',
+)
+@pytest.mark.django_db(
+    transaction=True, databases=['default', 'replica1', 'replica2']
+)
+def test_request_reads_from_one_replica(settings):
+    """
+    Все чтения одного запроса идут с одной реплики, выбранной
+    ReplicaPinMiddleware.
+    """
+    settings.DATABASE_REPLICAS = ['replica1', 'replica2']
+    news = News.objects.create(title='Заголовок', text='Текст')
+    Comment.objects.create(news=news, text='Комментарий')
+    url = reverse('news:detail', kwargs={'pk': news.pk})
+    for _ in range(10):
+        with CaptureQueriesContext(connections['replica1']) as first, \
+                CaptureQueriesContext(connections['replica2']) as second:
+            response = Client().get(url)
+        assert 'Комментарий' in response.content.decode()
+        assert sorted([len(first), len(second)])[0] == 0
+        assert len(first) + len(second) > 0
+
+
+@pytest.mark.django_db
+def test_commands_read_from_primary(news, settings):
+    """
+    Команды, которые пишут по результатам чтения, и повторное
+    сохранение объекта читают с основной базы: при отстающей реплике
+    иначе терялись бы строки. Реплика здесь — несуществующий алиас,
+    обращение к ней завершилось бы ошибкой.
+    """
+    item = news()
+    Comment.objects.create(news=item, text='Комментарий')
+    settings.DATABASE_REPLICAS = ['missing']
+    item.save()
+    call_command('reconcile_comment_counts', stdout=StringIO())
+    call_command('moderate_comments', stdout=StringIO())
+    if search.fts5_available():
+        output = StringIO()
+        call_command('rebuild_news_index', stdout=output)
+        assert 'новостей: 1,' in output.getvalue()
+
+
+@pytest.mark.django_db
+def test_save_rereads_version_from_written_database(news, monkeypatch):
+    """
+    Новая версия перечитывается из базы, куда новость записана, даже
+    если роутер отправил бы чтение на другую.
+    """
+    item = news()
+    monkeypatch.setattr(
+        ReplicaRouter, 'db_for_read', lambda self, model, **hints: 'missing'
+    )
+    item.save()
+    assert item.version == 2
+
+
+@pytest.mark.skipif(
+    not {'replica1'} <= set(connections),
+    reason='Реплики-зеркала заданы только в settings_test',
+)
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica1'])
+def test_home_page_cached_from_primary(news, settings):
+    """
+    Главная страница, которая попадёт в кеш, читает новости с основной
+    базы; с реплики берётся только ключ кеша.
+    """
+    settings.DATABASE_REPLICAS = ['replica1']
+    news()
+    with CaptureQueriesContext(connections['replica1']) as replica:
+        Client().get(reverse('news:home'))
+    assert len(replica) == 1
+
+
+@pytest.mark.django_db
+def test_reads_pinned_to_primary_after_write(news, settings):
+    """
+    После отправки комментария клиент получает cookie, и его запросы
+    читают с основной базы, пока cookie не истечёт.
+    """
+    User.objects.create_user(username='NAME', password='PASS')
+    client = Client()
+    client.login(username='NAME', password='PASS')
+    response = client.post(reverse('news:detail', kwargs={'pk': news().pk}),
+                           {'text': 'COMMENT TEXT'})
+    cookie = response.cookies[PIN_COOKIE]
+    assert cookie['max-age'] == settings.NEWS_REPLICA_PIN_SECONDS
+    middleware = ReplicaPinMiddleware(
+        lambda request: HttpResponse(str(is_pinned()))
+    )
+    request = RequestFactory().get('/')
+    assert middleware(request).content == b'False'
+    request.COOKIES[PIN_COOKIE] = cookie.value
+    assert middleware(request).content == b'True'
+    assert not is_pinned()
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_applied_on_connect(settings):
+    """
+    PRAGMA из SQLITE_PRAGMAS выполняются на каждом новом соединении.
+    """
+    settings.SQLITE_PRAGMAS = {'cache_size': -1234}
+    fresh = connections.create_connection('default')
+    try:
+        with fresh.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            assert cursor.fetchone() == (-1234,)
+    finally:
+        fresh.close()
+
+
+@pytest.mark.django_db
+def test_session_and_user_served_from_cache(news,
+                                            django_assert_num_queries):
+    """
+    При тёплом кеше авторизованный запрос не читает из базы ни сессию,
+    ни пользователя; смена пароля убирает пользователя из кеша, и старая
+    сессия перестаёт действовать.
+    """
+    user = User.objects.create_user(username='NAME', password='PASS')
+    url = reverse('news:comments', kwargs={'pk': news().pk})
+    client = Client()
+    client.login(username='NAME', password='PASS')
+    client.get(url)
+    with django_assert_num_queries(2):
+        response = client.get(url)
+    assert response.wsgi_request.user == user
+    user.set_password('NEW')
+    user.save()
+    response = client.get(url)
+    assert not response.wsgi_request.user.is_authenticated
+
+
+@pytest.mark.django_db
+def test_legacy_sessions_moved_to_cached_backend(news, settings):
+    """
+    Сессия, выданная ModelBackend, которого больше нет в списке
+    бэкендов, после миграции данных снова действует.
+    """
+    legacy = 'django.contrib.auth.backends.ModelBackend'
+    assert legacy not in settings.AUTHENTICATION_BACKENDS
+    User.objects.create_user(username='NAME', password='PASS')
+    client = Client()
+    client.login(username='NAME', password='PASS')
+    session = client.session
+    session[BACKEND_SESSION_KEY] = legacy
+    session.save()
+    url = reverse('news:comments', kwargs={'pk': news().pk})
+    assert not client.get(url).wsgi_request.user.is_authenticated
+    rewrite_session_backends(legacy)(apps, connection.schema_editor())
+    assert client.get(url).wsgi_request.user.is_authenticated
+
+
+@pytest.mark.django_db
+def test_user_forgotten_on_groups_and_permissions_change():
+    """Изменение групп и прав пользователя с любой стороны связи
+    убирает его из кеша."""
+    user = User.objects.create(username='NAME')
+    group = Group.objects.create(name='editors')
+    key = CACHE_KEY.format(user.pk)
+    changes = (
+        lambda: user.groups.add(group),
+        lambda: group.user_set.remove(user),
+        lambda: group.user_set.add(user),
+        lambda: group.user_set.clear(),
+        lambda: user.user_permissions.add(Permission.objects.first()),
+        lambda: user.user_permissions.clear(),
+    )
+    for change in changes:
+        CachedModelBackend().get_user(user.pk)
+        assert cache.get(key) is not None
+        change()
+        assert cache.get(key) is None
@@ -0,0 +1,115 @@
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from news.urls import app_name, urlpatterns
+from testing.performance import scale_time
+
+# Базовый уровень для каждого имени URL: запросов к базе, миллисекунд
+# и КиБ пиковой памяти на запрос. Запросы — точные текущие значения,
+# время и память — с большим запасом: они ловят только заметный рост.
+# Время проверяется при PERF_TIME_SCALE.
+BASELINES = {
+    'news:home': (2, 250, 256),
+    'news:detail': (3, 250, 512),
+    'news:comments': (2, 250, 512),
+    'news:edit': (1, 250, 256),
+    'news:delete': (1, 250, 256),
+    'news:search': (2, 250, 256),
+    'news:home_async': (None, 250, 256),
+    'news:detail_async': (None, 250, 512),
+}
+
+
+@pytest.fixture
+def page(make_news, make_users, make_comments):
+    """Полная главная и новость с полной страницей комментариев."""
+    news_list = make_news(10)
+    author, = make_users(1)
+    comment = make_comments(news_list[0], 50, [author])[0]
+    author_client = Client()
+    author_client.force_login(author)
+    return {
+        'news': news_list[0],
+        'comment': comment,
+        'author_client': author_client,
+    }
+
+
+def sync_request(name, page):
+    news, comment = page['news'], page['comment']
+    client = Client()
+    if name == 'news:home':
+        return client, reverse(name), {}
+    if name in ('news:detail', 'news:comments'):
+        return client, reverse(name, kwargs={'pk': news.pk}), {}
+    if name in ('news:edit', 'news:delete'):
+        return (
+            page['author_client'],
+            reverse(name, kwargs={'pk': comment.pk}),
+            {},
+        )
+    if name == 'news:search':
+        return client, reverse(name), {'q': 'новости'}
+    raise AssertionError(f'Нет запроса для {name}')
+
+
+def test_every_url_has_baseline():
+    names = {f'{app_name}:{pattern.name}' for pattern in urlpatterns}
+    assert names == set(BASELINES)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'name',
+    [name for name in BASELINES if not name.endswith('_async')]
+)
+def test_baseline(name, page, assert_performance):
+    client, url, data = sync_request(name, page)
+    client.get(url, data)
+    max_queries, max_ms, max_kib = BASELINES[name]
+    with assert_performance(max_queries=max_queries, label=name):
+        response = client.get(url, data)
+    assert response.status_code == HTTPStatus.OK
+    with assert_performance(max_ms=max_ms, label=name):
+        client.get(url, data)
+    with assert_performance(max_kib=max_kib, label=name):
+        client.get(url, data)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_baseline(page, assert_performance):
+    """Запросы асинхронных страниц выполняются в пуле потоков и не
+    учитываются, поэтому для них проверяются только время и память."""
+    client = AsyncClient()
+
+    async def get(url):
+        return await client.get(url)
+
+    urls = {
+        'news:home_async': reverse('news:home_async'),
+        'news:detail_async': reverse(
+            'news:detail_async', kwargs={'pk': page['news'].pk}
+        ),
+    }
+    for name, url in urls.items():
+        async_to_sync(get)(url)
+        _, max_ms, max_kib = BASELINES[name]
+        with assert_performance(max_ms=max_ms, label=name):
+            response = async_to_sync(get)(url)
+        assert response.status_code == HTTPStatus.OK
+        with assert_performance(max_kib=max_kib, label=name):
+            async_to_sync(get)(url)
+
+
+def test_time_budget_needs_scale(monkeypatch):
+    """Без PERF_TIME_SCALE время не проверяется, с ней бюджет
+    умножается на её значение."""
+    monkeypatch.delenv('PERF_TIME_SCALE', raising=False)
+    assert scale_time(250) is None
+    monkeypatch.setenv('PERF_TIME_SCALE', '4')
+    assert scale_time(250) == 1000
+    assert scale_time(None) is None
@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+from news.models import Comment
+from common.auth import CachedModelBackend
+
+
+@pytest.fixture
+def author():
+    return User.objects.create(username='author')
+
+
+@pytest.fixture
+def author_client(author):
+    client = Client()
+    client.force_login(author)
+    # Вход обновляет last_login и убирает пользователя из кеша; здесь
+    # кеш прогревается, как это сделал бы первый же запрос.
+    CachedModelBackend().get_user(author.pk)
+    return client
+
+
+@pytest.fixture
+def news_with_comment(news, author):
+    news = news()
+    comment = Comment.objects.create(news=news, author=author, text='Text')
+    return news, comment
+
+
+@pytest.mark.django_db
+def test_home_queries(news_with_comment, django_assert_num_queries):
+    """Главная: ключ кеша и список новостей; из кеша — только ключ."""
+    client = Client()
+    with django_assert_num_queries(2):
+        client.get(reverse('news:home'))
+    with django_assert_num_queries(1):
+        client.get(reverse('news:home'))
+
+
+@pytest.mark.django_db
+def test_detail_queries(news_with_comment, author_client,
+                        django_assert_num_queries):
+    """Страница новости: версия новости для ETag, новость и страница
+    комментариев с авторами. Сессия и пользователь берутся из кеша,
+    поэтому авторизованному пользователю страница стоит столько же.
+    Если страница не изменилась, остаётся только проверка версии."""
+    news, _ = news_with_comment
+    url = reverse('news:detail', kwargs={'pk': news.pk})
+    with django_assert_num_queries(3):
+        etag = Client().get(url)['ETag']
+    with django_assert_num_queries(1):
+        response = Client().get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    with django_assert_num_queries(3):
+        author_client.get(url)
+    with django_assert_num_queries(2):
+        Client().get(reverse('news:comments', kwargs={'pk': news.pk}))
+
+
+@pytest.mark.django_db
+def test_post_comment_queries(news_with_comment, author_client,
+                              django_assert_num_queries):
+    """Отправка комментария: новость, вставка, счётчик комментариев
+    и запись в поисковый индекс."""
+    news, _ = news_with_comment
+    with django_assert_num_queries(4):
+        response = author_client.post(
+            reverse('news:detail', kwargs={'pk': news.pk}), {'text': 'New'}
+        )
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db
+def test_edit_comment_queries(news_with_comment, author_client,
+                              django_assert_num_queries):
+    """Редактирование: комментарий вместе с новостью одним запросом;
+    при сохранении обновляются версия новости и поисковый индекс."""
+    _, comment = news_with_comment
+    url = reverse('news:edit', kwargs={'pk': comment.pk})
+    with django_assert_num_queries(1):
+        author_client.get(url)
+    with django_assert_num_queries(4):
+        response = author_client.post(url, {'text': 'Edited'})
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db
+def test_delete_comment_queries(news_with_comment, author_client,
+                                django_assert_num_queries):
+    """Удаление: комментарий загружается один раз; кроме удаления
+    обновляются счётчик комментариев и поисковый индекс."""
+    _, comment = news_with_comment
+    url = reverse('news:delete', kwargs={'pk': comment.pk})
+    with django_assert_num_queries(1):
+        author_client.get(url)
+    with django_assert_num_queries(4):
+        response = author_client.post(url)
+    assert response.status_code == HTTPStatus.FOUND
@@ -1,7 +1,11 @@
 from http import HTTPStatus
+from urllib.parse import urlencode
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
 from django.urls import reverse
 import pytest
 from news.models import Comment, News
+from common.middleware import QueryBudgetExceeded
 from django.contrib.auth.models import User
 
 
@@ -125,3 +129,83 @@ def test_anon_can_go_to_login_sign_up_out_pages(client):
     assert response.status_code == 200
     response = client.get(reverse('users:logout'), follow=True)
     assert response.status_code == 200
+
+
+def async_request(method, client, url, *args):
+    async def request():
+        return await getattr(client, method)(url, *args)
+    return async_to_sync(request)()
+
+
+def async_get(client, url):
+    return async_request('get', client, url)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_pages():
+    '''Асинхронные варианты главной страницы и страницы новости
+    отдают те же данные, а комментарий через них публикуется.'''
+    user = User.objects.create_user(username='name', password='password')
+    news = News.objects.create(title='Title', text='Text')
+    Comment.objects.create(news=news, author=user, text='First')
+    client = AsyncClient()
+    response = async_get(client, reverse('news:home_async'))
+    assert response.status_code == HTTPStatus.OK
+    assert list(response.context['object_list']) == [news]
+    url = reverse('news:detail_async', kwargs={'pk': news.pk})
+    response = async_get(client, url)
+    assert response.status_code == HTTPStatus.OK
+    assert 'form' not in response.context
+    assert [c.text for c in response.context['comments']] == ['First']
+    client.force_login(user)
+    # В Django 3.2 тестовый AsyncClient отдаёт разбору multipart тело
+    # без ограничения по длине, и тот читает за его конец; форма в
+    # urlencoded читается целиком и проходит через асинхронный вид.
+    response = async_request(
+        'post', client, url, urlencode({'text': 'Second'}),
+        'application/x-www-form-urlencoded',
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url == reverse(
+        'news:detail', kwargs={'pk': news.pk}
+    ) + '#comments'
+    response = async_get(client, url)
+    assert 'form' in response.context
+    assert [c.text for c in response.context['comments']] == [
+        'First', 'Second'
+    ]
+    response = async_get(
+        client, reverse('news:detail_async', kwargs={'pk': news.pk + 1})
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_server_timing_and_query_budget(client, settings):
+    '''Ответ содержит заголовок Server-Timing, а превышение бюджета
+    запросов в строгом режиме приводит к ошибке.'''
+    response = client.get(reverse('news:home'))
+    timing = response['Server-Timing']
+    assert timing.startswith('db;dur=')
+    assert 'desc="2 queries"' in timing
+    assert 'tpl;dur=' in timing and 'total;dur=' in timing
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(reverse('news:home'))
+    settings.QUERY_BUDGET_STRICT = False
+    response = client.get(reverse('news:home'))
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_request_metrics_logged_only_when_enabled(client, settings, caplog):
+    '''Метрики запроса пишутся в лог, только если включён
+    QUERY_BUDGET_LOG.'''
+    caplog.set_level('INFO', logger='common.middleware')
+    settings.QUERY_BUDGET_LOG = False
+    client.get(reverse('news:home'))
+    assert not caplog.records
+    settings.QUERY_BUDGET_LOG = True
+    client.get(reverse('news:home'))
+    [record] = caplog.records
+    assert record.metrics['view'] == 'news:home'
@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from news import search
+
+COMMENTS = 10_000
+
+
+@pytest.fixture(scope='module')
+def story(shared_db, make_news, make_users, make_comments):
+    """Одна новость с 10 000 комментариев, общая для тестов модуля."""
+    news, = make_news(1)
+    make_comments(news, COMMENTS, make_users(20))
+    return news
+
+
+@pytest.mark.django_db
+def test_detail_queries_do_not_grow(story, settings,
+                                    django_assert_num_queries):
+    """Страница новости с 10 000 комментариев выводит одну порцию
+    и делает столько же запросов, сколько для новости с одним."""
+    with django_assert_num_queries(3):
+        response = Client().get(
+            reverse('news:detail', kwargs={'pk': story.pk})
+        )
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.context['comments']) == (
+        settings.COMMENTS_COUNT_ON_NEWS_PAGE
+    )
+
+
+@pytest.mark.django_db
+def test_home_shows_comment_count(story):
+    response = Client().get(reverse('news:home'))
+    assert f'Комментариев: {COMMENTS}' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_cursor_walks_all_comments(story, settings):
+    """Курсор проходит все комментарии без пропусков и повторов."""
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 1000
+    client = Client()
+    url = reverse('news:comments', kwargs={'pk': story.pk})
+    seen = []
+    cursor = None
+    while True:
+        page = client.get(url, {'after': cursor} if cursor else {}).json()
+        seen.extend(comment['id'] for comment in page['comments'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == COMMENTS
+
+
+@pytest.mark.django_db
+def test_search_finds_story_by_comment(story):
+    assert search.search_news('Комментарий 9999').news == [story]
@@ -0,0 +1,178 @@
+"""Полнотекстовый поиск по новостям и комментариям к ним.
+
+Заголовки и тексты новостей индексируются в таблице FTS5
+news_news_fts, тексты комментариев — в news_comment_fts вместе
+с неиндексируемым id новости. Новость находится и по своему тексту,
+и по тексту комментария к ней, но совпадение в самой новости весит
+больше. Таблицы создаёт миграция, в актуальном состоянии их держат
+сигналы. Если SQLite собран без FTS5 или база не SQLite, поиск
+перебирает таблицы через icontains; на SQLite такой поиск
+не учитывает регистр только для латиницы.
+"""
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection, connections, router
+from django.db.models import Q
+
+from .models import News
+
+NEWS_TABLE = 'news_news_fts'
+COMMENT_TABLE = 'news_comment_fts'
+# Во сколько раз совпадение в комментарии весит меньше, чем в новости.
+COMMENT_WEIGHT = 0.3
+# Более короткое начало слова раскрылось бы в слишком многие слова.
+PREFIX_MIN_LENGTH = 3
+TOKEN = re.compile(r'\w+')
+# Сколько строк индекса удалять одним запросом: SQLite ограничивает
+# число параметров в запросе.
+REMOVE_BATCH_SIZE = 500
+
+SearchPage = namedtuple('SearchPage', ('news', 'next_page'))
+
+# Используется ли FTS5; None — ещё не найден. Тесты и бенчмарки задают
+# значение явно, чтобы сравнить оба способа поиска.
+_fts5 = None
+
+
+def fts5_available():
+    """Создала ли миграция таблицы FTS5 в этой базе."""
+    return (
+        connection.vendor == 'sqlite'
+        and NEWS_TABLE in connection.introspection.table_names()
+    )
+
+
+def use_fts5():
+    """Искать ли через FTS5.
+
+    Запоминается только найденный FTS5: таблицы могут появиться позже,
+    если миграция выполнена после первого обращения к поиску.
+    """
+    global _fts5
+    if _fts5 is None and fts5_available():
+        _fts5 = True
+    return bool(_fts5)
+
+
+def tokenize(query):
+    return TOKEN.findall(query.lower())
+
+
+def match_expression(terms):
+    """Запрос FTS5: новость должна содержать все слова.
+
+    Последнее слово ищется как начало слова, остальные — целиком:
+    префикс раскрывается во все подходящие слова индекса.
+    """
+    *words, last = (f'"{term}"' for term in terms)
+    if len(terms[-1]) >= PREFIX_MIN_LENGTH:
+        last += '*'
+    return ' '.join(words + [last])
+
+
+def index_news(news_list):
+    if not use_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {NEWS_TABLE}(rowid, title, text) '
+            'VALUES (%s, %s, %s)',
+            [(news.pk, news.title, news.text) for news in news_list],
+        )
+
+
+def index_comments(comments):
+    if not use_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {COMMENT_TABLE}(rowid, news_id, text) '
+            'VALUES (%s, %s, %s)',
+            [(comment.pk, comment.news_id, comment.text)
+             for comment in comments],
+        )
+
+
+def _remove(table, pks):
+    """Удаляет строки индекса пачками по REMOVE_BATCH_SIZE одним
+    запросом на пачку."""
+    if not use_fts5():
+        return
+    pks = list(pks)
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), REMOVE_BATCH_SIZE):
+            batch = pks[start:start + REMOVE_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM {table} WHERE rowid IN ({placeholders})', batch
+            )
+
+
+def remove_news(pks):
+    _remove(NEWS_TABLE, pks)
+
+
+def remove_comments(pks):
+    _remove(COMMENT_TABLE, pks)
+
+
+def clear_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {NEWS_TABLE}')
+        cursor.execute(f'DELETE FROM {COMMENT_TABLE}')
+
+
+def _search_fts(terms, limit, offset):
+    """id новостей от самой релевантной; bm25 тем меньше, чем лучше."""
+    expression = match_expression(terms)
+    sql = (
+        f'SELECT rowid AS news_id, bm25({NEWS_TABLE}, 10.0, 1.0) AS score '
+        f'FROM {NEWS_TABLE} WHERE {NEWS_TABLE} MATCH %s'
+    )
+    params = [expression]
+    if settings.NEWS_SEARCH_COMMENTS:
+        sql += (
+            ' UNION ALL '
+            f'SELECT news_id, bm25({COMMENT_TABLE}, 0.0, 1.0) * %s '
+            f'FROM {COMMENT_TABLE} WHERE {COMMENT_TABLE} MATCH %s'
+        )
+        params += [COMMENT_WEIGHT, expression]
+    with connections[router.db_for_read(News)].cursor() as cursor:
+        cursor.execute(
+            f'SELECT news_id FROM ({sql}) GROUP BY news_id '
+            'ORDER BY MIN(score), news_id DESC LIMIT %s OFFSET %s',
+            params + [limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_icontains(terms, limit, offset):
+    """id подходящих новостей от свежих к старым, перебором таблиц."""
+    queryset = News.objects.all()
+    for term in terms:
+        lookup = Q(title__icontains=term) | Q(text__icontains=term)
+        if settings.NEWS_SEARCH_COMMENTS:
+            lookup |= Q(comment__text__icontains=term)
+        queryset = queryset.filter(lookup)
+    return list(
+        queryset.distinct().order_by('-date', '-id')
+        .values_list('id', flat=True)[offset:offset + limit]
+    )
+
+
+def search_news(query, page=1, size=None):
+    """Страница page результатов поиска и номер следующей страницы."""
+    if size is None:
+        size = settings.NEWS_SEARCH_RESULTS_ON_PAGE
+    terms = tokenize(query)
+    if not terms:
+        return SearchPage([], None)
+    search = _search_fts if use_fts5() else _search_icontains
+    pks = search(terms, size + 1, (page - 1) * size)
+    next_page = page + 1 if len(pks) > size else None
+    news = News.objects.in_bulk(pks[:size])
+    return SearchPage(
+        [news[pk] for pk in pks[:size] if pk in news], next_page
+    )
@@ -0,0 +1,110 @@
+from contextvars import ContextVar
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import search
+from .caching import invalidate_home_page
+from .counters import recount_comments
+from .models import Comment, News
+
+
+class Deletion:
+    """Одно удаление через Collector: сначала рассылаются pre_delete
+    для всех объектов, затем удаляются строки и рассылаются post_delete.
+    К первому post_delete комментариев новости все её удаляемые
+    комментарии уже удалены, так что счётчик достаточно пересчитать
+    один раз. Если удаление прервётся ошибкой, его состояние достанется
+    следующему: худшее, что случится, — пропущенный пересчёт, который
+    исправит команда reconcile_comment_counts."""
+
+    def __init__(self):
+        self.finishing = False
+        self.news = set()
+        self.recounted = set()
+
+
+_deletion = ContextVar('comment_deletion', default=None)
+
+
+def current_deletion(starting):
+    """Состояние текущего удаления; pre_delete после post_delete
+    означает, что началось следующее удаление."""
+    deletion = _deletion.get()
+    if deletion is None or starting and deletion.finishing:
+        deletion = Deletion()
+        _deletion.set(deletion)
+    deletion.finishing = not starting
+    return deletion
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_home_page_cache(sender, **kwargs):
+    """Любое изменение новостей и комментариев сбрасывает кеш главной."""
+    invalidate_home_page()
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    """Новый комментарий увеличивает счётчик, любое изменение — версию
+    новости. Фикстуры (raw) загружаются с уже посчитанными значениями."""
+    if raw:
+        return
+    changes = {'version': F('version') + 1}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+    News.objects.filter(pk=instance.news_id).update(**changes)
+
+
+@receiver(pre_delete, sender=News)
+def news_deleting(sender, instance, **kwargs):
+    current_deletion(starting=True).news.add(instance.pk)
+
+
+@receiver(post_delete, sender=News)
+def news_deleted(sender, instance, **kwargs):
+    current_deletion(starting=False)
+
+
+@receiver(pre_delete, sender=Comment)
+def comment_deleting(sender, instance, **kwargs):
+    current_deletion(starting=True)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Срабатывает и при каскадном удалении: вместе с автором
+    комментария или с самой новостью. Счётчик пересчитывается один раз
+    на новость, а у удаляемой вместе с комментариями новости — никогда.
+    """
+    deletion = current_deletion(starting=False)
+    if instance.news_id in deletion.news | deletion.recounted:
+        return
+    deletion.recounted.add(instance.news_id)
+    recount_comments([instance.news_id])
+
+
+@receiver(post_save, sender=News)
+def index_news(sender, instance, **kwargs):
+    search.index_news([instance])
+
+
+@receiver(post_delete, sender=News)
+def remove_news(sender, instance, **kwargs):
+    search.remove_news([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, update_fields=None, **kwargs):
+    """Если текст не сохранялся, переиндексировать нечего."""
+    if update_fields is None or 'text' in update_fields:
+        search.index_comments([instance])
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment(sender, instance, **kwargs):
+    search.remove_comments([instance.pk])
@@ -1,11 +1,22 @@
+import hashlib
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.core.exceptions import BadRequest
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
+from yanews.routers import pin_to_primary
 
+from .caching import get_home_page_key
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import get_comments_page
+from .search import search_news
 
 
 class NewsList(generic.ListView):
@@ -14,35 +25,127 @@ class NewsList(generic.ListView):
     template_name = 'news/home.html'
     context_object_name = 'context'
 
+    def get(self, request, *args, **kwargs):
+        """Анонимным пользователям отдаём страницу из кеша."""
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = get_home_page_key()
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content)
+        # Страница попадёт в кеш на NEWS_HOME_CACHE_TIMEOUT, поэтому
+        # новости читаются с основной базы, а не с отстающей реплики.
+        # Читаются они здесь, а не при отрисовке: та идёт уже вне блока.
+        with pin_to_primary():
+            response = super().get(request, *args, **kwargs)
+            list(response.context_data['object_list'])
+        response.add_post_render_callback(
+            lambda response: cache.set(
+                key, response.content, settings.NEWS_HOME_CACHE_TIMEOUT
+            )
+        )
+        return response
+
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
-
-
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+
+def news_detail_etag(request, pk):
+    """ETag страницы новости: версия новости меняется при любом изменении
+    её самой и комментариев к ней. Страница зависит ещё от пользователя
+    (форма и ссылки на свои комментарии) и от курсора комментариев.
+
+    В форме вошедшего пользователя есть CSRF-токен, поэтому в ETag
+    входит и отпечаток CSRF-cookie: после его смены (например, при новом
+    входе) сохранённая в браузере страница с прежним токеном не годится.
+    """
+    version = News.objects.filter(pk=pk).values_list(
+        'version', flat=True
+    ).first()
+    if version is None:
+        return None
+    csrf = ''
+    if request.user.is_authenticated:
+        csrf = hashlib.sha256(
+            request.META.get('CSRF_COOKIE', '').encode()
+        ).hexdigest()[:16]
+    return '{}.{}.{}.{}.{}'.format(
+        pk, version, request.user.pk or 0, csrf, request.GET.get('after', '')
+    )
+
+
+@method_decorator(condition(etag_func=news_detail_etag), name='get')
 class NewsDetail(generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
+        """Комментарии выводятся постранично, начиная с курсора `after`."""
         context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = get_comments_page(
+            self.object, self.request.GET.get('after')
+        )
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsCommentsJson(generic.View):
+    """Очередная страница комментариев к новости в формате JSON."""
+
+    def get(self, request, *args, **kwargs):
+        news = get_object_or_404(News, pk=kwargs['pk'])
+        comments, next_cursor = get_comments_page(
+            news, request.GET.get('after')
+        )
+        return JsonResponse({
+            'comments': [
+                self.serialize(comment) for comment in comments
+            ],
+            'next_cursor': next_cursor,
+        })
+
+    def serialize(self, comment):
+        data = {
+            'id': comment.pk,
+            'author': str(comment.author) if comment.author else None,
+            'text': comment.text,
+            'created': comment.created.isoformat(),
+        }
+        if comment.author_id and comment.author_id == self.request.user.pk:
+            data['edit_url'] = reverse('news:edit', args=(comment.pk,))
+            data['delete_url'] = reverse('news:delete', args=(comment.pk,))
+        return data
+
+
+class NewsSearch(generic.TemplateView):
+    """Поиск по новостям и комментариям, по релевантности."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            page = 0
+        if page < 1:
+            raise BadRequest('Некорректный номер страницы.')
+        context['query'] = query
+        context['object_list'], context['next_page'] = search_news(
+            query, page
+        )
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
         generic.detail.SingleObjectMixin,
@@ -65,8 +168,9 @@ class NewsComment(
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -86,14 +190,20 @@ class CommentBase(LoginRequiredMixin):
     context_object_name = 'context'
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Комментарий уже загружен в self.object, повторно не запрашиваем."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """Пользователь может работать только со своими комментариями.
+
+        Новость нужна шаблонам редактирования и удаления, поэтому
+        загружается тем же запросом.
+        """
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
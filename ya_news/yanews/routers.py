@@ -0,0 +1,103 @@
+"""Чтение новостей и комментариев с реплик базы данных.
+
+Запросы на чтение к моделям приложения news уходят на одну из реплик
+DATABASE_REPLICAS, запись — на основную базу. Реплики отстают от
+основной базы, и каждая по-своему, поэтому ReplicaPinMiddleware
+выбирает базу для чтения один раз на весь HTTP-запрос: страница
+собирается из одного состояния данных. Пользователь, который только
+что что-то изменил, должен читать с основной базы: за ней закрепляются
+небезопасные запросы (POST и т. п.) и все запросы того же клиента
+в течение NEWS_REPLICA_PIN_SECONDS после них. Вне HTTP-запроса каждое
+чтение идёт на случайную реплику, поэтому команды, которые пишут
+по результатам чтения, работают внутри pin_to_primary().
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'read_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# База для чтения в текущем запросе: DEFAULT_DB_ALIAS при закреплении,
+# реплика, выбранная на весь запрос, или None — выбирать при каждом
+# чтении.
+_read_db = ContextVar('news_read_db', default=None)
+
+
+@contextmanager
+def pin_to_primary():
+    """Внутри блока все чтения идут на основную базу."""
+    token = _read_db.set(DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        _read_db.reset(token)
+
+
+def is_pinned():
+    return _read_db.get() == DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    route_app_labels = {'news'}
+
+    def db_for_read(self, model, **hints):
+        if (model._meta.app_label not in self.route_app_labels
+                or not settings.DATABASE_REPLICAS):
+            return None
+        # Объект перечитывается (refresh_from_db, связанные объекты)
+        # из той базы, откуда он получен или куда только что записан:
+        # на реплике его может ещё не быть.
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if is_pinned():
+            return None
+        return _read_db.get() or random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплики хранят те же данные, что и основная база."""
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Схема реплик приходит с основной базы, а не из миграций."""
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        unsafe = request.method not in SAFE_METHODS
+        if unsafe or PIN_COOKIE in request.COOKIES:
+            database = DEFAULT_DB_ALIAS
+        elif settings.DATABASE_REPLICAS:
+            database = random.choice(settings.DATABASE_REPLICAS)
+        else:
+            database = None
+        token = _read_db.set(database)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_db.reset(token)
+        if unsafe:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.NEWS_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -1,9 +1,17 @@
+import os
+import sys
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий для ya_news и ya_note код (пакет common) лежит в корне
+# репозитория.
+sys.path.append(str(BASE_DIR.parent))
+
+from common.db import sqlite_profile  # noqa: E402
+
 SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
 
 DEBUG = True
@@ -21,6 +29,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'common.middleware.QueryBudgetMiddleware',
+    'yanews.routers.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,6 +68,46 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения перечисляются через запятую в переменной
+# окружения NEWS_DB_REPLICAS. Локально это копии db.sqlite3, которые
+# обновляет команда sync_replicas; в тестах реплики — зеркала default.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+        filter(None, os.environ.get('NEWS_DB_REPLICAS', '').split(',')),
+        start=1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['yanews.routers.ReplicaRouter']
+
+# Боевой профиль SQLite включается переменной окружения
+# DB_PROFILE=production (см. common/db.py).
+SQLITE_PRAGMAS = sqlite_profile(DATABASES)
+
+# Сколько секунд после изменения данных клиент читает с основной базы.
+NEWS_REPLICA_PIN_SECONDS = 5
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Сессии пишутся в базу и в кеш, читаются из кеша; пользователь для
+# AuthenticationMiddleware тоже берётся из кеша (см. common/auth.py).
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Сессии, выданные прежними бэкендами, переводит на этот миграция
+# данных (см. common.auth.rewrite_session_backends).
+AUTHENTICATION_BACKENDS = ['common.auth.CachedModelBackend']
+
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -76,7 +126,53 @@ STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'common.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+QUERY_BUDGETS = {
+    'news:home': 2,
+    'news:detail': 6,
+    'news:comments': 2,
+    'news:edit': 6,
+    'news:delete': 6,
+    'news:search': 4,
+}
+
+QUERY_BUDGET_STRICT = DEBUG
+
+# Писать ли метрики каждого запроса в лог: в бою это лишняя строка
+# лога на запрос, Server-Timing отдаётся и без этого.
+QUERY_BUDGET_LOG = DEBUG
+
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+NEWS_HOME_CACHE_TIMEOUT = 60 * 5
+
+NEWS_BAD_WORDS_ENGINE = 'news.profanity.AhoCorasickMatcher'
+
+NEWS_BAD_WORDS_FILE = None
+
+COMMENTS_COUNT_ON_NEWS_PAGE = 50
+
+NEWS_SEARCH_RESULTS_ON_PAGE = 20
+
+# Искать ли новости по текстам комментариев к ним.
+NEWS_SEARCH_COMMENTS = True
+
+NEWS_ASYNC_DB_WORKERS = 8
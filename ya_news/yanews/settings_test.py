@@ -0,0 +1,16 @@
+"""Настройки для тестов: быстрый хешер паролей и база в памяти."""
+from .settings import *  # noqa: F401,F403
+from testing.settings import PASSWORD_HASHERS  # noqa: F401
+from testing.settings import use_memory_databases
+
+# Две реплики — зеркала default — для тестов маршрутизации чтения.
+# Остальные тесты читают с основной базы: фикстура read_from_primary
+# очищает DATABASE_REPLICAS.
+for number in (1, 2):
+    DATABASES.setdefault(f'replica{number}', {  # noqa: F405
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIRROR': 'default'},
+    })
+
+use_memory_databases(DATABASES)  # noqa: F405
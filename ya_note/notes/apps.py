@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from common import auth, db
+
+        from . import signals  # noqa: F401
+
+        db.connect_signals()
+        auth.connect_signals()
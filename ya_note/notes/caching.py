@@ -0,0 +1,37 @@
+"""Кеш страниц заметок.
+
+Заметку видит только её автор, поэтому страница кешируется отдельно
+для каждой пары (автор, slug). В ключ страницы входит версия этой
+пары; сигналы сбрасывают её при сохранении и удалении заметки,
+а при смене slug — и под прежним адресом.
+"""
+import uuid
+
+from django.core.cache import cache
+
+DETAIL_VERSION_KEY = 'notes:detail:version:{}:{}'
+
+
+def get_detail_version(author_pk, slug):
+    """Текущая версия страницы заметки.
+
+    Если версии в кеше нет, создаётся новая уникальная: так страницы,
+    сохранённые под вытесненной версией, уже не будут прочитаны.
+    """
+    key = DETAIL_VERSION_KEY.format(author_pk, slug)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_detail_page(author_pk, slug):
+    """Делает недействительной сохранённую страницу заметки."""
+    cache.delete(DETAIL_VERSION_KEY.format(author_pk, slug))
+
+
+def get_detail_page_key(author_pk, slug):
+    """Ключ кеша страницы заметки."""
+    version = get_detail_version(author_pk, slug)
+    return f'notes:detail:{author_pk}:{slug}:{version}'
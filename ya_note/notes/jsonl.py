@@ -0,0 +1,105 @@
+"""Выгрузка и загрузка заметок в формате JSON Lines.
+
+Одна строка — одна заметка: {"title": ..., "text": ..., "slug": ...}.
+Выгрузка читает заметки итератором, загрузка сохраняет их пачками
+через bulk_create, поэтому расход памяти не зависит от числа заметок.
+"""
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .models import SLUG_ALLOCATION_ATTEMPTS, Note, savepoint
+from .search import index_notes
+from .slugs import allocate_slugs, slugify_title
+
+FIELDS = ('title', 'text', 'slug')
+BATCH_SIZE = 500
+
+
+class NotesImportError(ValueError):
+    """Строка входных данных не описывает заметку."""
+
+    def __init__(self, line_number, message):
+        self.line_number = line_number
+        super().__init__(f'Строка {line_number}: {message}')
+
+
+def export_lines(author):
+    """Заметки автора, по строке JSON на заметку."""
+    notes = Note.objects.filter(author=author).order_by('id').values(*FIELDS)
+    for note in notes.iterator(chunk_size=BATCH_SIZE):
+        yield json.dumps(note, ensure_ascii=False) + '\n'
+
+
+def parse_line(line_number, line):
+    try:
+        data = json.loads(line)
+    except ValueError:
+        raise NotesImportError(line_number, 'некорректный JSON.')
+    if not isinstance(data, dict):
+        raise NotesImportError(line_number, 'ожидается объект.')
+    note = Note(
+        title=data.get('title') or Note._meta.get_field('title').default,
+        text=data.get('text'),
+        slug=data.get('slug') or '',
+    )
+    try:
+        note.clean_fields(exclude=('author',))
+    except ValidationError as error:
+        raise NotesImportError(line_number, '; '.join(
+            f'{field}: {" ".join(messages)}'
+            for field, messages in error.message_dict.items()
+        ))
+    return note
+
+
+def save_batch(notes, author):
+    """Сохраняет пачку заметок одним INSERT с заранее подобранными slug.
+
+    bulk_create не вызывает сигналов, поэтому заметки добавляются
+    в поисковый индекс здесь. Не на всех СУБД bulk_create заполняет id,
+    так что сохранённые заметки перечитываются по slug.
+    """
+    max_length = Note._meta.get_field('slug').max_length
+    bases = [note.slug or slugify_title(note.title) for note in notes]
+    for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+        slugs = allocate_slugs(Note.objects, bases, max_length)
+        for note, slug in zip(notes, slugs):
+            note.author = author
+            note.slug = slug
+        try:
+            with savepoint():
+                Note.objects.bulk_create(notes)
+                saved = list(Note.objects.filter(slug__in=slugs))
+                index_notes(saved)
+                return saved
+        except IntegrityError:
+            if attempt + 1 == SLUG_ALLOCATION_ATTEMPTS:
+                raise
+
+
+def import_lines(lines, author, batch_size=BATCH_SIZE):
+    """Загружает заметки из строк JSON; всё или ничего.
+
+    Занятые slug получают числовой суффикс, как при создании заметки.
+    Возвращает число загруженных заметок.
+    """
+    created = 0
+    batch = []
+    with transaction.atomic():
+        for line_number, line in enumerate(lines, start=1):
+            if isinstance(line, bytes):
+                try:
+                    line = line.decode('utf-8')
+                except UnicodeDecodeError:
+                    raise NotesImportError(line_number, 'ожидается UTF-8.')
+            if not line.strip():
+                continue
+            batch.append(parse_line(line_number, line))
+            if len(batch) >= batch_size:
+                created += len(save_batch(batch, author))
+                batch = []
+        if batch:
+            created += len(save_batch(batch, author))
+    return created
@@ -0,0 +1,37 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.jsonl import BATCH_SIZE, NotesImportError, import_lines
+
+
+class Command(BaseCommand):
+    help = 'Загружает заметки пользователя из файла в формате JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--input', default='-',
+            help='Файл с заметками; по умолчанию стандартный ввод.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден.')
+        try:
+            if options['input'] == '-':
+                created = self.load(sys.stdin, author, options)
+            else:
+                with open(options['input'], encoding='utf-8') as lines:
+                    created = self.load(lines, author, options)
+        except NotesImportError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(f'Загружено заметок: {created}.'))
+
+    def load(self, lines, author, options):
+        return import_lines(lines, author, options['batch_size'])
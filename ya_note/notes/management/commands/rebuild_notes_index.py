@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes.models import Note
+from notes.search import get_backend
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс по всем заметкам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        notes = Note.objects.only('id', 'author_id', 'title', 'text')
+        batch = []
+        indexed = 0
+        with transaction.atomic():
+            backend.clear()
+            for note in notes.iterator(chunk_size=options['batch_size']):
+                batch.append(note)
+                if len(batch) >= options['batch_size']:
+                    backend.index(batch)
+                    indexed += len(batch)
+                    batch = []
+            backend.index(batch)
+            indexed += len(batch)
+        self.stdout.write(f'Проиндексировано заметок: {indexed}.')
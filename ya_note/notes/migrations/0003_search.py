@@ -0,0 +1,55 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:29
+
+from django.conf import settings
+from django.db import OperationalError, migrations, models
+import django.db.models.deletion
+
+
+def create_fts_table(apps, schema_editor):
+    """FTS5 есть не в каждой сборке SQLite: без него поиск работает
+    по таблице NoteTerm."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE notes_note_fts '
+            'USING fts5(author, title, text)'
+        )
+    except OperationalError:
+        return
+    Note = apps.get_model('notes', 'Note')
+    schema_editor.execute(
+        'INSERT INTO notes_note_fts(rowid, author, title, text) '
+        "SELECT id, 'a' || author_id, title, text FROM %s"
+        % Note._meta.db_table
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS notes_note_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='notes.note')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='noteterm',
+            index=models.Index(fields=['author', 'term'], name='noteterm_author_term_idx'),
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
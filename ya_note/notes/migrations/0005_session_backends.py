@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from common.auth import rewrite_session_backends
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sessions', '0001_initial'),
+        ('notes', '0004_note_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rewrite_session_backends(
+                'django.contrib.auth.backends.ModelBackend',
+                'yanote.auth.CachedModelBackend',
+            ),
+            migrations.RunPython.noop,
+        ),
+    ]
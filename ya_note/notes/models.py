@@ -1,7 +1,22 @@
+from contextlib import nullcontext
+
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+
+from .slugs import allocate_slug, slugify_title
+
+SLUG_ALLOCATION_ATTEMPTS = 5
+
+
+def savepoint(using=None):
+    """Точка сохранения, если уже идёт транзакция.
 
-from pytils.translit import slugify
+    Тогда ошибку запроса можно откатить, не ломая внешнюю транзакцию.
+    В режиме autocommit откатывать нечего и лишний BEGIN не нужен.
+    """
+    if transaction.get_connection(using).in_atomic_block:
+        return transaction.atomic(using=using)
+    return nullcontext()
 
 
 class Note(models.Model):
@@ -27,12 +42,90 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    # Растёт при каждом сохранении: по версии строится ETag страницы.
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает автора и slug из базы: если их изменят, кеш
+        страницы прежнего автора под прежним адресом тоже нужно
+        сбросить."""
+        instance = super().from_db(db, field_names, values)
+        if 'slug' in field_names:
+            instance._loaded_slug = instance.slug
+        if 'author_id' in field_names:
+            instance._loaded_author_id = instance.author_id
+        return instance
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """Версия увеличивается выражением F(), чтобы параллельные
+        сохранения не получили одну и ту же версию; затем новое
+        значение перечитывается из базы."""
+        if self._state.adding:
+            return self._save_with_slug(*args, **kwargs)
+        version = self.version
+        self.version = models.F('version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        try:
+            self._save_with_slug(*args, **kwargs)
+        except Exception:
+            self.version = version
+            raise
+        self.refresh_from_db(using=self._state.db, fields=['version'])
+
+    def _save_with_slug(self, *args, **kwargs):
+        """Если slug не указан, подбираем свободный по заголовку.
+
+        Параллельная запись может занять подобранный slug раньше нас:
+        тогда вставка упрётся в уникальный индекс, и мы подберём
+        следующий вариант. Если занят slug, указанный явно,
+        IntegrityError передаётся вызывающему коду.
+        """
+        using = kwargs.get('using')
+        if self.slug:
+            with savepoint(using):
+                return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        base = slugify_title(self.title)
+        others = Note.objects.exclude(pk=self.pk) if self.pk else Note.objects
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+            self.slug = allocate_slug(others, base, max_slug_length)
+            try:
+                with savepoint(using):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                slug_taken = others.filter(slug=self.slug).exists()
+                if not slug_taken or attempt + 1 == SLUG_ALLOCATION_ATTEMPTS:
+                    self.slug = ''
+                    raise
+
+
+class NoteTerm(models.Model):
+    """Слово из заметки: инвертированный индекс для поиска без FTS5."""
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name='terms',
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    term = models.CharField(max_length=100)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'term'), name='noteterm_author_term_idx'
+            ),
+        )
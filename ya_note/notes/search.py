@@ -0,0 +1,151 @@
+"""Полнотекстовый поиск по заметкам автора.
+
+На SQLite с FTS5 индекс хранится в виртуальной таблице notes_note_fts.
+Автор записывается в неё отдельным индексируемым токеном, поэтому
+ограничение поиска заметками автора — пересечение списков в индексе,
+а не фильтр по всем совпадениям. На остальных СУБД используется
+инвертированный индекс в таблице NoteTerm.
+
+Индекс обновляется сигналами при сохранении и удалении заметки;
+bulk_create сигналов не вызывает, поэтому после него нужно вызвать
+index_notes() явно.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+from .models import Note, NoteTerm
+
+FTS_TABLE = 'notes_note_fts'
+TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+class Fts5Backend:
+
+    def index(self, notes):
+        rows = [(note.pk, f'a{note.author_id}', note.title, note.text)
+                for note in notes]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {FTS_TABLE}'
+                '(rowid, author, title, text) '
+                'VALUES (%s, %s, %s, %s)',
+                rows,
+            )
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk in pks],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def search(self, author, terms, limit):
+        """id заметок, от самой релевантной; заголовок весит больше текста.
+
+        Последнее слово запроса ищется как начало слова: пользователь
+        мог его не дописать. Остальные слова ищутся целиком, потому что
+        каждый префикс раскрывается во все подходящие слова индекса.
+        """
+        *words, last = (f'"{term}"' for term in terms)
+        query = f'author : a{author.pk} AND ' + ' '.join(words + [last + '*'])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, 0.0, 10.0, 1.0) LIMIT %s',
+                [query, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class TermIndexBackend:
+
+    def index(self, notes):
+        notes = list(notes)
+        NoteTerm.objects.filter(note__in=notes).delete()
+        NoteTerm.objects.bulk_create(
+            NoteTerm(note_id=note.pk, author_id=note.author_id, term=term)
+            for note in notes
+            for term in set(tokenize(f'{note.title} {note.text}'))
+            if len(term) <= NoteTerm._meta.get_field('term').max_length
+        )
+
+    def remove(self, pks):
+        NoteTerm.objects.filter(note_id__in=pks).delete()
+
+    def clear(self):
+        NoteTerm.objects.all().delete()
+
+    def search(self, author, terms, limit):
+        """id заметок, содержащих все слова запроса, от новых к старым."""
+        terms = set(terms)
+        return list(
+            NoteTerm.objects.filter(author=author, term__in=terms)
+            .values('note_id')
+            .annotate(matches=Count('term'))
+            .filter(matches=len(terms))
+            .order_by('-note_id')
+            .values_list('note_id', flat=True)[:limit]
+        )
+
+
+_backend = None
+
+
+def fts5_available():
+    """Создала ли миграция таблицу FTS5 в этой базе."""
+    return (
+        connection.vendor == 'sqlite'
+        and FTS_TABLE in connection.introspection.table_names()
+    )
+
+
+def get_backend():
+    """Выбирает механизм поиска по настройке NOTES_SEARCH_BACKEND.
+
+    При 'auto' запоминается только найденный FTS5: таблица может
+    появиться позже, если миграция выполнена после первого обращения
+    к поиску.
+    """
+    global _backend
+    if _backend is not None:
+        return _backend
+    choice = settings.NOTES_SEARCH_BACKEND
+    if choice == 'auto':
+        if not fts5_available():
+            return TermIndexBackend()
+        choice = 'fts5'
+    _backend = Fts5Backend() if choice == 'fts5' else TermIndexBackend()
+    return _backend
+
+
+def index_notes(notes):
+    get_backend().index(notes)
+
+
+def remove_notes(pks):
+    get_backend().remove(pks)
+
+
+def search_notes(author, query, limit=None):
+    """Заметки автора, подходящие под запрос, в порядке релевантности."""
+    terms = tokenize(query)
+    if not terms:
+        return []
+    pks = get_backend().search(
+        author, terms, limit or settings.NOTES_SEARCH_RESULTS
+    )
+    notes = Note.objects.filter(
+        author=author, pk__in=pks
+    ).only('id', 'slug', 'title').in_bulk()
+    return [notes[pk] for pk in pks if pk in notes]
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_detail_page
+from .models import Note
+from .search import index_notes, remove_notes
+
+
+@receiver(post_save, sender=Note)
+def index_note(sender, instance, update_fields=None, **kwargs):
+    """Обновляет поисковый индекс, если изменился заголовок или текст."""
+    if update_fields is None or {'title', 'text'} & set(update_fields):
+        index_notes([instance])
+
+
+@receiver(post_delete, sender=Note)
+def remove_note(sender, instance, **kwargs):
+    remove_notes([instance.pk])
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalidate_detail_page_cache(sender, instance, **kwargs):
+    """Сбрасывает кеш страницы заметки, а при смене автора или slug —
+    и страницы под прежними автором и адресом."""
+    loaded_author_id = getattr(
+        instance, '_loaded_author_id', instance.author_id
+    )
+    loaded_slug = getattr(instance, '_loaded_slug', instance.slug)
+    for author_id in {loaded_author_id, instance.author_id}:
+        for slug in {loaded_slug, instance.slug}:
+            invalidate_detail_page(author_id, slug)
+    instance._loaded_author_id = instance.author_id
+    instance._loaded_slug = instance.slug
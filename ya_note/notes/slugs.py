@@ -0,0 +1,98 @@
+"""Формирование и подбор уникального slug для заметки.
+
+slug из заголовка получается транслитерацией pytils. Результаты
+кешируются (LRU на NOTES_SLUG_CACHE_SIZE заголовков), а заголовки
+из латиницы, цифр, пробелов и дефисов преобразуются без транслитерации.
+
+Если slug из заголовка занят, к нему добавляется числовой суффикс:
+`zametka`, `zametka-2`, `zametka-3`... Все занятые варианты
+выбираются одним запросом по диапазону уникального индекса slug.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import Q
+from pytils.translit import slugify
+
+# Самый длинный суффикс, под который заранее оставляется место.
+SUFFIX_RESERVE = len('-999999999')
+# Символ больше любого допустимого в slug: верхняя граница диапазона.
+SLUG_UPPER_BOUND = '~'
+DEFAULT_SLUG = 'note'
+# Для таких заголовков pytils только приводит регистр и заменяет
+# пробелы на дефисы: транслитерировать нечего.
+ASCII_SAFE_TITLE = re.compile(r'[A-Za-z0-9 -]*')
+
+
+@lru_cache(maxsize=settings.NOTES_SLUG_CACHE_SIZE)
+def _slugify(title):
+    return slugify(title)
+
+
+def slugify_title(title):
+    """slug из заголовка заметки, без учёта длины и уникальности."""
+    if ASCII_SAFE_TITLE.fullmatch(title):
+        return re.sub(r'[- ]+', '-', title.lower())
+    return _slugify(title)
+
+
+def cache_info():
+    """Счётчики попаданий и промахов кеша транслитерации."""
+    return _slugify.cache_info()
+
+
+def make_candidate(base, number, max_length):
+    """Вариант slug с номером number; первый вариант — без суффикса."""
+    if number == 1:
+        return base[:max_length]
+    suffix = f'-{number}'
+    return base[:max_length - len(suffix)] + suffix
+
+
+def starts_with(prefix):
+    """Условие «slug начинается с prefix» в виде диапазона по индексу.
+
+    В отличие от LIKE, диапазон использует индекс на любой СУБД,
+    в том числе на SQLite с регистронезависимым LIKE.
+    """
+    return Q(slug__gte=prefix, slug__lt=prefix + SLUG_UPPER_BOUND)
+
+
+def allocate_slug(queryset, base, max_length, reserved=frozenset()):
+    """Возвращает первый вариант slug, которого нет ни в queryset,
+    ни среди уже распределённых reserved."""
+    base = base or DEFAULT_SLUG
+    if len(base) + SUFFIX_RESERVE <= max_length:
+        lookup = Q(slug=base) | starts_with(f'{base}-')
+    else:
+        lookup = starts_with(base[:max_length - SUFFIX_RESERVE])
+    taken = set(queryset.filter(lookup).values_list('slug', flat=True))
+    taken.update(reserved)
+    number = 1
+    while make_candidate(base, number, max_length) in taken:
+        number += 1
+    return make_candidate(base, number, max_length)
+
+
+def allocate_slugs(queryset, bases, max_length):
+    """Распределяет уникальные slug сразу для пачки заметок.
+
+    Один запрос находит, какие из желаемых slug уже заняты; отдельные
+    запросы нужны только для занятых, чтобы подобрать им суффикс.
+    """
+    bases = [make_candidate(base or DEFAULT_SLUG, 1, max_length)
+             for base in bases]
+    taken = set(
+        queryset.filter(slug__in=set(bases)).values_list('slug', flat=True)
+    )
+    slugs = []
+    reserved = set()
+    for base in bases:
+        if base in taken or base in reserved:
+            slug = allocate_slug(queryset, base, max_length, reserved)
+        else:
+            slug = base
+        reserved.add(slug)
+        slugs.append(slug)
+    return slugs
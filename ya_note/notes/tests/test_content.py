@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -43,3 +44,23 @@ class TestContent(TestCase):
         url = reverse('notes:add')
         response = self.client.get(url)
         self.assertIn('form', response.context)
+
+    def test_list_paginated(self):
+        self.client.force_login(self.author)
+        Note.objects.bulk_create(
+            Note(title=f'Title {i}', text='Text', slug=f'slug-{i}',
+                 author=self.author)
+            for i in range(settings.NOTES_COUNT_ON_HOME_PAGE)
+        )
+        response = self.client.get(self.URL)
+        first_page = response.context['object_list']
+        self.assertEqual(len(first_page), settings.NOTES_COUNT_ON_HOME_PAGE)
+        self.assertEqual(first_page[0], self.note)
+        self.assertIn('text', first_page[0].get_deferred_fields())
+        response = self.client.get(
+            self.URL, {'after': response.context['next_after']}
+        )
+        second_page = response.context['object_list']
+        self.assertEqual(len(second_page), 1)
+        self.assertIsNone(response.context['next_after'])
+        self.assertGreater(second_page[0].id, first_page[-1].id)
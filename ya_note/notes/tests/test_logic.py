@@ -1,7 +1,22 @@
+from http import HTTPStatus
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import connections
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from notes import models, search
+from notes.forms import NoteForm, WARNING
+from notes.jsonl import import_lines
 from notes.models import Note
+from notes.slugs import cache_info, slugify_title
+from pytils.translit import slugify
 
 User = get_user_model()
 
@@ -73,6 +88,113 @@ class NoteSlugGenerationTest(TestCase):
         self.assertIsNotNone(note.slug)
 
 
+class NoteSlugAllocationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='test')
+
+    def test_common_title_gets_numeric_suffix(self):
+        """
+        Заметки с одинаковым заголовком получают slug с номером.
+        """
+        slugs = [
+            Note.objects.create(title='Заголовок', text='Текст',
+                                author=self.user).slug
+            for _ in range(3)
+        ]
+        self.assertEqual(slugs, ['zagolovok', 'zagolovok-2', 'zagolovok-3'])
+
+    def test_suffix_fits_max_length(self):
+        """
+        Суффикс не выводит slug за пределы длины поля.
+        """
+        first = Note.objects.create(title='a' * 100, text='Текст',
+                                    author=self.user)
+        second = Note.objects.create(title='a' * 100, text='Текст',
+                                     author=self.user)
+        self.assertEqual(first.slug, 'a' * 100)
+        self.assertEqual(second.slug, 'a' * 98 + '-2')
+
+    def test_concurrent_writer_took_slug(self):
+        """
+        Если подобранный slug заняли параллельно, заметка сохраняется
+        со следующим свободным вариантом.
+        """
+        Note.objects.create(title='Заголовок', text='Текст',
+                            author=self.user)
+        stale = iter(['zagolovok'])
+
+        def allocate(queryset, base, max_length):
+            return next(stale, None) or allocate_slug(
+                queryset, base, max_length
+            )
+
+        allocate_slug = models.allocate_slug
+        with mock.patch.object(models, 'allocate_slug', allocate):
+            note = Note.objects.create(title='Заголовок', text='Текст',
+                                       author=self.user)
+        self.assertEqual(note.slug, 'zagolovok-2')
+
+    def test_form_accepts_common_title(self):
+        """
+        Форма без slug не отклоняет заголовок, который уже встречался.
+        """
+        Note.objects.create(title='Заголовок', text='Текст',
+                            author=self.user)
+        form = NoteForm(data={'title': 'Заголовок', 'text': 'Текст'})
+        self.assertTrue(form.is_valid())
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_taken_slug_race_returns_form_error(self):
+        """
+        Если указанный slug заняли между проверкой формы и сохранением,
+        пользователь получает ошибку формы, а не ошибку сервера.
+        """
+        Note.objects.create(title='Заметка', text='Текст', slug='taken',
+                            author=self.user)
+        self.client.force_login(self.user)
+        with mock.patch.object(NoteForm, 'clean_slug',
+                               lambda form: form.cleaned_data['slug']):
+            response = self.client.post(reverse('notes:add'), data={
+                'title': 'Заметка', 'text': 'Текст', 'slug': 'taken',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].errors['slug'],
+                         ['taken' + WARNING])
+        self.assertEqual(Note.objects.count(), 1)
+
+
+class SlugifyTitleTest(TestCase):
+    def test_matches_pytils(self):
+        """
+        Кешированная и быстрая ASCII-версия дают тот же slug, что и pytils.
+        """
+        for title in ('Заголовок заметки', 'Shopping list 2', 'a -- B',
+                      ' Trailing ', 'Tom & Jerry', 'Ёжик в тумане!',
+                      'snake_case', 'C++ и Python'):
+            with self.subTest(title=title):
+                self.assertEqual(slugify_title(title), slugify(title))
+
+    def test_repeated_title_hits_cache(self):
+        """
+        Повторный заголовок не транслитерируется заново.
+        """
+        before = cache_info()
+        slugify_title('Повторяющийся заголовок')
+        slugify_title('Повторяющийся заголовок')
+        after = cache_info()
+        self.assertEqual(after.misses - before.misses, 1)
+        self.assertEqual(after.hits - before.hits, 1)
+
+    def test_ascii_title_skips_cache(self):
+        """
+        Заголовок из латиницы обрабатывается без транслитерации.
+        """
+        before = cache_info()
+        self.assertEqual(slugify_title('Plain Title 2'), 'plain-title-2')
+        self.assertEqual(cache_info(), before)
+
+
 class NoteAuthorizationTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -142,3 +264,320 @@ class NoteAuthorizationTest(TestCase):
         self.assertEqual(response.status_code, 404)
         count = Note.objects.count()
         self.assertEqual(count, 1)
+
+
+class NotesJsonLinesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.other = User.objects.create(username='other')
+        cls.note = Note.objects.create(title='Заметка', text='Текст',
+                                       author=cls.author)
+        Note.objects.create(title='Чужая', text='Текст', author=cls.other)
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def test_export_streams_own_notes(self):
+        """
+        Выгрузка содержит только заметки пользователя, по строке на каждую.
+        """
+        response = self.client.get(reverse('notes:export'))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'title': 'Заметка', 'text': 'Текст', 'slug': 'zametka'}
+        ])
+
+    def test_import_allocates_slugs(self):
+        """
+        Загрузка создаёт заметки пачками и подбирает свободные slug,
+        в том числе для повторов внутри одной пачки.
+        """
+        body = '\n'.join(json.dumps(line, ensure_ascii=False) for line in (
+            {'title': 'Заметка', 'text': 'Первая'},
+            {'title': 'Заметка', 'text': 'Вторая'},
+            {'title': 'Другая', 'text': 'Третья', 'slug': 'zametka'},
+            {'title': 'Своя', 'text': 'Четвёртая', 'slug': 'svoya'},
+        ))
+        response = self.client.post(reverse('notes:import'), body,
+                                    content_type='application/x-ndjson')
+        self.assertEqual(response.json(), {'created': 4})
+        self.assertEqual(
+            list(Note.objects.filter(author=self.author).order_by('id')
+                 .values_list('slug', flat=True)),
+            ['zametka', 'zametka-2', 'zametka-3', 'zametka-4', 'svoya'],
+        )
+
+    def test_import_rejects_invalid_line(self):
+        """
+        Ошибка в любой строке отменяет загрузку целиком.
+        """
+        body = '{"title": "Заметка", "text": "Текст"}\n{"title": "Без текста"}'
+        response = self.client.post(reverse('notes:import'), body,
+                                    content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Строка 2', response.json()['error'])
+        self.assertEqual(Note.objects.count(), 2)
+
+    def test_import_rejects_invalid_utf8(self):
+        """
+        Строка не в UTF-8 — ошибка клиента, а не сервера.
+        """
+        body = '{"title": "Заметка", "text": "Текст"}\n'.encode() + b'\xff\xfe'
+        response = self.client.post(reverse('notes:import'), body,
+                                    content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Строка 2', response.json()['error'])
+        self.assertEqual(Note.objects.count(), 2)
+
+    def test_commands_round_trip(self):
+        """
+        Заметки, выгруженные командой, загружаются обратно командой.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.jsonl'
+            call_command('export_notes', 'author', '--output', str(path))
+            call_command('import_notes', 'other', '--input', str(path),
+                         '--batch-size', '1', stdout=StringIO())
+        copy = Note.objects.get(author=self.other, title='Заметка')
+        self.assertEqual(copy.slug, 'zametka-2')
+
+
+class NoteSearchTest(TestCase):
+    backend = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.other = User.objects.create(username='other')
+        cls.shopping = Note.objects.create(
+            title='Покупки', text='Молоко и хлеб', author=cls.author
+        )
+        cls.milk = Note.objects.create(
+            title='Молоко', text='Купить', author=cls.author
+        )
+        Note.objects.create(title='Молоко', text='Чужое', author=cls.other)
+
+    def setUp(self):
+        if self.backend is not None:
+            patcher = mock.patch.object(search, '_backend', self.backend())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+            call_command('rebuild_notes_index', stdout=StringIO())
+        self.client.force_login(self.author)
+
+    def find(self, query):
+        response = self.client.get(reverse('notes:search'), {'q': query})
+        return list(response.context['object_list'])
+
+    def test_finds_only_own_notes(self):
+        """
+        Поиск находит заметки по словам заголовка и текста,
+        но только заметки пользователя.
+        """
+        self.assertCountEqual(self.find('молоко'), [self.shopping, self.milk])
+        self.assertEqual(self.find('хлеб молоко'), [self.shopping])
+        self.assertEqual(self.find('чужое'), [])
+
+    def test_index_follows_changes(self):
+        """
+        Индекс обновляется при изменении, удалении и загрузке заметок.
+        """
+        self.milk.text = 'Кефир'
+        self.milk.save()
+        self.assertEqual(self.find('кефир'), [self.milk])
+        self.assertEqual(self.find('купить'), [])
+        self.shopping.delete()
+        self.assertEqual(self.find('хлеб'), [])
+        import_lines(['{"title": "Список", "text": "Хлеб"}'], self.author)
+        self.assertEqual(
+            [note.title for note in self.find('хлеб')], ['Список']
+        )
+
+
+class NoteSearchFts5Test(NoteSearchTest):
+    backend = search.Fts5Backend
+
+    def setUp(self):
+        if not search.fts5_available():
+            self.skipTest('SQLite собран без FTS5')
+        super().setUp()
+
+    def test_title_ranks_higher_and_prefix_matches(self):
+        """
+        Совпадение в заголовке важнее совпадения в тексте;
+        последнее слово запроса ищется как начало слова.
+        """
+        self.assertEqual(self.find('молок'), [self.milk, self.shopping])
+        self.assertEqual(self.find('молок хле'), [])
+        self.assertEqual(self.find('молоко хле'), [self.shopping])
+
+
+class NoteSearchTermIndexTest(NoteSearchTest):
+    backend = search.TermIndexBackend
+
+
+class SearchBackendChoiceTest(TestCase):
+    @override_settings(NOTES_SEARCH_BACKEND='auto')
+    @mock.patch.object(search, '_backend', None)
+    def test_missing_fts5_not_remembered(self):
+        """
+        Отсутствие таблицы FTS5 не запоминается: после миграции поиск
+        переходит на FTS5.
+        """
+        with mock.patch.object(search, 'fts5_available', return_value=False):
+            self.assertIsInstance(
+                search.get_backend(), search.TermIndexBackend
+            )
+        with mock.patch.object(search, 'fts5_available', return_value=True):
+            self.assertIsInstance(search.get_backend(), search.Fts5Backend)
+        with mock.patch.object(search, 'fts5_available', return_value=False):
+            self.assertIsInstance(search.get_backend(), search.Fts5Backend)
+
+
+class NoteConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.note = Note.objects.create(title='Заметка', text='Текст',
+                                       author=cls.author)
+
+    def setUp(self):
+        self.client.force_login(self.author)
+        self.url = reverse('notes:detail', args=[self.note.slug])
+
+    def test_not_modified_until_note_saved(self):
+        """
+        Страница заметки отдаёт 304, пока заметка не сохранена заново.
+        """
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.client.post(reverse('notes:edit', args=[self.note.slug]), {
+            'title': 'Заметка', 'text': 'Новый текст', 'slug': self.note.slug,
+        })
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Новый текст')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_on_title_only_save(self):
+        """
+        Сохранение с update_fields тоже меняет версию и ETag,
+        а версия в объекте после сохранения — число из базы.
+        """
+        etag = self.client.get(self.url)['ETag']
+        self.note.title = 'Новый заголовок'
+        self.note.save(update_fields=['title'])
+        self.assertEqual(
+            self.note.version, Note.objects.get(pk=self.note.pk).version
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_differs_for_new_note_with_same_slug(self):
+        """
+        Заметка, созданная под slug удалённой, получает другой ETag,
+        хотя её версия та же.
+        """
+        etag = self.client.get(self.url)['ETag']
+        slug = self.note.slug
+        self.note.delete()
+        Note.objects.create(title='Заметка', text='Текст', slug=slug,
+                            author=self.author)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class SqlitePragmasTest(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1234})
+    def test_pragmas_applied_on_connect(self):
+        """
+        PRAGMA из SQLITE_PRAGMAS выполняются на каждом новом соединении.
+        """
+        fresh = connections.create_connection('default')
+        self.addCleanup(fresh.close)
+        with fresh.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone(), (-1234,))
+
+
+class CachedAuthTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author',
+                                              password='password')
+
+    def test_session_and_user_served_from_cache(self):
+        """
+        При тёплом кеше список заметок читает из базы только заметки,
+        а смена пароля убирает пользователя из кеша и завершает сессию.
+        """
+        self.client.login(username='author', password='password')
+        self.client.get(reverse('notes:list'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('notes:list'))
+        self.assertEqual(response.wsgi_request.user, self.author)
+        self.author.set_password('new-password')
+        self.author.save()
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+
+class NoteDetailCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.note = Note.objects.create(title='Заметка', text='Текст',
+                                       slug='note', author=cls.author)
+
+    def setUp(self):
+        self.client.force_login(self.author)
+        self.url = reverse('notes:detail', args=[self.note.slug])
+
+    def test_repeat_view_served_from_cache(self):
+        """
+        Повторный просмотр не обращается к базе, другой пользователь
+        кешированную страницу не получает.
+        """
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Текст')
+        self.client.force_login(self.reader)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_edit_visible_at_once(self):
+        """
+        Правка видна сразу, а после смены slug прежний адрес
+        больше не открывается.
+        """
+        self.client.get(self.url)
+        self.client.post(reverse('notes:edit', args=[self.note.slug]), {
+            'title': 'Заметка', 'text': 'Новый текст', 'slug': 'renamed',
+        })
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.client.get(reverse('notes:detail', args=['renamed']))
+        self.assertContains(response, 'Новый текст')
+
+    def test_deleted_note_not_served(self):
+        self.client.get(self.url)
+        self.client.post(reverse('notes:delete', args=[self.note.slug]))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_reassigned_note_not_served_to_previous_author(self):
+        """
+        Заметка, переданная другому автору, не открывается у прежнего
+        из кеша.
+        """
+        self.client.get(self.url)
+        note = Note.objects.get(pk=self.note.pk)
+        note.author = self.reader
+        note.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
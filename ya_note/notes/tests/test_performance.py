@@ -0,0 +1,83 @@
+import json
+from http import HTTPStatus
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from notes.models import Note
+from notes.urls import app_name, urlpatterns
+from testing.performance import PerformanceAssertionsMixin
+
+User = get_user_model()
+
+
+class PerformanceBaselineTest(PerformanceAssertionsMixin, TestCase):
+    # Базовый уровень для каждого имени URL: запросов к базе,
+    # миллисекунд и КиБ пиковой памяти на запрос. Запросы — точные
+    # текущие значения, время и память — с большим запасом: они ловят
+    # только заметный рост. Время проверяется при PERF_TIME_SCALE.
+    BASELINES = {
+        'notes:home': (0, 250, 256),
+        'notes:add': (0, 250, 256),
+        'notes:edit': (1, 250, 256),
+        'notes:detail': (0, 250, 256),
+        'notes:delete': (1, 250, 256),
+        'notes:list': (1, 250, 256),
+        'notes:search': (2, 250, 256),
+        'notes:success': (0, 250, 256),
+        'notes:export': (1, 250, 256),
+        'notes:import': (8, 250, 256),
+    }
+    # Заголовки загружаемых заметок не повторяются между запросами.
+    imported = count()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.notes = [
+            Note.objects.create(title=f'Заметка {number}', text='Текст',
+                                author=cls.author)
+            for number in range(20)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def request(self, name):
+        """Запрос к странице; потоковый ответ читается целиком."""
+        slug = self.notes[0].slug
+        if name in ('notes:edit', 'notes:detail', 'notes:delete'):
+            response = self.client.get(reverse(name, args=(slug,)))
+        elif name == 'notes:search':
+            response = self.client.get(reverse(name), {'q': 'заметка'})
+        elif name == 'notes:import':
+            line = {'title': f'Загруженная {next(self.imported)}',
+                    'text': 'Текст'}
+            response = self.client.post(
+                reverse(name), json.dumps(line, ensure_ascii=False),
+                content_type='application/x-ndjson',
+            )
+        else:
+            response = self.client.get(reverse(name))
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def test_every_url_has_baseline(self):
+        self.assertEqual(
+            {f'{app_name}:{pattern.name}' for pattern in urlpatterns},
+            set(self.BASELINES),
+        )
+
+    def test_baselines(self):
+        for name, (max_queries, max_ms, max_kib) in self.BASELINES.items():
+            with self.subTest(name=name):
+                self.request(name)
+                with self.assertMaxQueries(max_queries, label=name):
+                    response = self.request(name)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                with self.assertPerformance(max_ms=max_ms, label=name):
+                    self.request(name)
+                with self.assertPerformance(max_kib=max_kib, label=name):
+                    self.request(name)
@@ -1,8 +1,9 @@
 from http import HTTPStatus
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from notes.models import Note
+from common.middleware import QueryBudgetExceeded
 
 User = get_user_model()
 
@@ -86,3 +87,16 @@ class NoteTestCase(TestCase):
         response = self.client.get(reverse('notes:detail', args=[note.slug]))
         self.assertRedirects(response, login_url + reverse('notes:detail',
                                                            args=[note.slug]))
+
+    def test_server_timing_and_query_budget(self):
+        """
+        Проверка, что ответ содержит заголовок Server-Timing, а превышение
+        бюджета запросов в строгом режиме приводит к ошибке.
+        """
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('notes:list'))
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+        with override_settings(QUERY_BUDGETS={'notes:list': 0},
+                               QUERY_BUDGET_STRICT=True):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('notes:list'))
@@ -1,9 +1,19 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.core.exceptions import BadRequest
+from django.db import IntegrityError
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
-from .forms import NoteForm
+from .caching import get_detail_page_key
+from .forms import WARNING, NoteForm
+from .jsonl import NotesImportError, export_lines, import_lines
 from .models import Note
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -26,22 +36,34 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin:
+    """Сохранение формы заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """Указанный slug мог быть занят между проверкой формы и
+        сохранением: показываем ошибку формы, а не IntegrityError."""
+        try:
+            return super().form_valid(form)
+        except IntegrityError:
+            slug = form.cleaned_data['slug']
+            if not slug or not Note.objects.filter(slug=slug).exists():
+                raise
+            form.add_error('slug', slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -50,10 +72,121 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """Список всех заметок пользователя.
+
+    Заметки выводятся порциями по возрастанию id: следующая порция
+    начинается после id из параметра `after`.
+    """
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """Загружаем только поля, которые выводятся в списке."""
+        queryset = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+        after = self.request.GET.get('after')
+        if after:
+            try:
+                queryset = queryset.filter(id__gt=int(after))
+            except ValueError:
+                raise BadRequest('Некорректный параметр after.')
+        return queryset[:settings.NOTES_COUNT_ON_HOME_PAGE + 1]
+
+    def get_context_data(self, **kwargs):
+        notes = list(self.object_list)
+        next_after = None
+        if len(notes) > settings.NOTES_COUNT_ON_HOME_PAGE:
+            notes = notes[:settings.NOTES_COUNT_ON_HOME_PAGE]
+            next_after = notes[-1].id
+        context = super().get_context_data(object_list=notes, **kwargs)
+        context['next_after'] = next_after
+        return context
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по заголовкам и текстам заметок пользователя.
+
+    Заметки выбираются по поисковому индексу, а не перебором таблицы;
+    результаты упорядочены по релевантности.
+    """
+    template_name = 'notes/search.html'
 
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        return search_notes(self.request.user, self.query)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        return context
+
+
+def note_detail_etag(request, slug):
+    """ETag страницы заметки — её pk и версия, растущая при каждом
+    сохранении: под тем же slug может оказаться другая заметка.
+
+    Если страница есть в кеше, ETag сохранён вместе с ней и база
+    не нужна; найденная страница запоминается в запросе для
+    NoteDetail.get.
+    """
+    request.note_page = cache.get(get_detail_page_key(request.user.pk, slug))
+    if request.note_page is not None:
+        return request.note_page[0]
+    note = Note.objects.filter(
+        author=request.user, slug=slug
+    ).values_list('pk', 'version').first()
+    if note is None:
+        return None
+    return '{}.{}.{}'.format(note[0], slug, note[1])
+
+
+@method_decorator(condition(etag_func=note_detail_etag), name='get')
 class NoteDetail(NoteBase, generic.DetailView):
-    """Заметка подробно."""
+    """Заметка подробно.
+
+    Отрисованная страница кешируется для автора, повторный просмотр
+    не обращается ни к базе, ни к шаблонам.
+    """
     template_name = 'notes/detail.html'
+
+    def get(self, request, *args, **kwargs):
+        page = getattr(request, 'note_page', None)
+        if page is not None:
+            return HttpResponse(page[1])
+        # Ключ берётся до чтения заметки: если её изменят раньше, чем
+        # страница попадёт в кеш, страница сохранится под устаревшей
+        # версией и не будет прочитана.
+        key = get_detail_page_key(request.user.pk, kwargs['slug'])
+        response = super().get(request, *args, **kwargs)
+        etag = '{}.{}.{}'.format(
+            self.object.pk, self.object.slug, self.object.version
+        )
+        response.add_post_render_callback(
+            lambda response: cache.set(
+                key, (etag, response.content),
+                settings.NOTES_DETAIL_CACHE_TIMEOUT,
+            )
+        )
+        return response
+
+
+class NotesExport(LoginRequiredMixin, generic.View):
+    """Выгрузка всех заметок пользователя в формате JSON Lines."""
+
+    def get(self, request, *args, **kwargs):
+        response = StreamingHttpResponse(
+            export_lines(request.user), content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="notes.jsonl"'
+        return response
+
+
+class NotesImport(LoginRequiredMixin, generic.View):
+    """Загрузка заметок из тела запроса в формате JSON Lines."""
+
+    def post(self, request, *args, **kwargs):
+        try:
+            created = import_lines(request, request.user)
+        except NotesImportError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        return JsonResponse({'created': created})
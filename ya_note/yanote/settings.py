@@ -1,9 +1,16 @@
+import sys
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий для ya_news и ya_note код (пакет common) лежит в корне
+# репозитория.
+sys.path.append(str(BASE_DIR.parent))
+
+from common.db import sqlite_profile  # noqa: E402
+
 SECRET_KEY = 'django-insecure-yipnj$#j!ajarq%k55z4kuf3x79)91h0h42o9!1ho(z=!%mt=#'
 
 DEBUG = False
@@ -22,6 +29,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'common.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +67,26 @@ DATABASES = {
     }
 }
 
+# Боевой профиль SQLite включается переменной окружения
+# DB_PROFILE=production (см. common/db.py).
+SQLITE_PRAGMAS = sqlite_profile(DATABASES)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Сессии пишутся в базу и в кеш, читаются из кеша; пользователь для
+# AuthenticationMiddleware тоже берётся из кеша (см. common/auth.py).
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Сессии, выданные прежними бэкендами, переводит на этот миграция
+# данных (см. common.auth.rewrite_session_backends).
+AUTHENTICATION_BACKENDS = ['common.auth.CachedModelBackend']
+
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -82,11 +110,53 @@ USE_TZ = True
 
 NOTES_COUNT_ON_HOME_PAGE = 10
 
+NOTES_DETAIL_CACHE_TIMEOUT = 60 * 5
+
 AUTHOR_COUNT = 10
 
+NOTES_SLUG_CACHE_SIZE = 4096
+
+# 'fts5', 'terms' или 'auto': FTS5, если он есть в SQLite.
+NOTES_SEARCH_BACKEND = 'auto'
+
+NOTES_SEARCH_RESULTS = 50
+
 STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'common.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 3,
+    'notes:search': 4,
+    'notes:detail': 4,
+    'notes:add': 7,
+    'notes:edit': 8,
+    'notes:delete': 6,
+    'notes:success': 2,
+}
+
+QUERY_BUDGET_STRICT = DEBUG
+
+# Писать ли метрики каждого запроса в лог: в бою это лишняя строка
+# лога на запрос, Server-Timing отдаётся и без этого.
+QUERY_BUDGET_LOG = DEBUG
+
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
@@ -0,0 +1,6 @@
+"""Настройки для тестов: быстрый хешер паролей и база в памяти."""
+from .settings import *  # noqa: F401,F403
+from testing.settings import PASSWORD_HASHERS  # noqa: F401
+from testing.settings import use_memory_databases
+
+use_memory_databases(DATABASES)  # noqa: F405